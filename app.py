@@ -112,6 +112,40 @@ class RateLimiter:
         conn.commit()
         conn.close()
 
+# Shared handlers
+# st.cache_resource keeps one instance per distinct configuration for the whole server process,
+# so widget interactions don't re-read token.pickle, re-run API discovery or reconfigure Gemini.
+def _file_mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+@st.cache_resource(show_spinner=False)
+def load_google_handler(credentials_path, token_path, credentials_mtime):
+    """credentials_mtime is only part of the cache key: uploading a new credentials.json rebuilds the handler."""
+    # Imports here to avoid top-level crashes
+    from google_handler import GoogleHandler
+    try:
+        return GoogleHandler(credentials_file=credentials_path, token_file=token_path)
+    except Exception as e:
+        # Fail silently for optional feature (cached too, so we don't retry on every rerun)
+        print(f"Google Drive integration disabled: {e}")
+        return None
+
+@st.cache_resource(show_spinner=False)
+def load_cv_processor(api_key):
+    """api_key is the cache key: a new key from the setup screen gets a new processor."""
+    from cv_processor import CVProcessor
+    return CVProcessor()
+
+@st.cache_resource(show_spinner=False)
+def load_job_finder():
+    from job_finder import JobFinder
+    return JobFinder()
+
+def clear_handler_cache():
+    load_google_handler.clear()
+    load_cv_processor.clear()
+    load_job_finder.clear()
+
 # Main application UI (original content)
 def main_app():
     # Page Config
@@ -136,26 +170,14 @@ def main_app():
 
     # Initialize Handlers
     def get_handlers():
-        # Imports here to avoid top-level crashes
-        from google_handler import GoogleHandler
-        from cv_processor import CVProcessor
-        from job_finder import JobFinder
-        
-        gh = None
+        # Handlers are cached process-wide (see load_* above), so reruns reuse the same clients
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        credentials_path = os.path.join(base_dir, 'credentials.json')
+        token_path = os.path.join(base_dir, 'token.pickle')
         try:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            credentials_path = os.path.join(base_dir, 'credentials.json')
-            token_path = os.path.join(base_dir, 'token.pickle')
-            # Try to init Google Handler, but allow failure
-            try:
-                gh = GoogleHandler(credentials_file=credentials_path, token_file=token_path)
-            except Exception as e:
-                # Fail silently for optional feature
-                print(f"Google Drive integration disabled: {e}")
-                gh = None
-            
-            cv = CVProcessor()
-            jf = JobFinder()
+            gh = load_google_handler(credentials_path, token_path, _file_mtime(credentials_path))
+            cv = load_cv_processor(os.getenv("GOOGLE_API_KEY"))
+            jf = load_job_finder()
             return gh, cv, jf
         except Exception as e:
             st.error(f"Initialization Error: {e}")
@@ -183,6 +205,8 @@ def main_app():
             cred_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "credentials.json")
             if os.path.exists(cred_path):
                 os.remove(cred_path)
+            # Drop the cached clients so they are rebuilt with the new configuration
+            clear_handler_cache()
             # Clear session state
             st.session_state.clear()
             st.rerun()
@@ -191,13 +215,38 @@ def main_app():
 
         # Debug Section
         with st.expander("Debug Info"):
-            import google.generativeai as genai
-            st.write(f"GenAI Version: {genai.__version__}")
+            # Read the version from package metadata; importing the SDK here would cost every rerun
+            from importlib.metadata import version, PackageNotFoundError
+            try:
+                st.write(f"GenAI Version: {version('google-generativeai')}")
+            except PackageNotFoundError:
+                st.write("GenAI Version: not installed")
+            
+            if cv_processor:
+                st.markdown("### LLM Response Cache")
+                st.json(cv_processor.cache_stats())
+                st.markdown("### Gemini Quota Scheduler")
+                st.json(cv_processor.scheduler_metrics())
+                st.markdown("### Coalesced Requests")
+                st.json(cv_processor.single_flight_stats())
+                st.markdown("### Prompt Token Budget")
+                st.json(cv_processor.budget_stats())
+                st.markdown("### PDF Extraction Cache")
+                st.json(cv_processor.extraction_stats())
+                st.markdown("### Job Fit Corpus")
+                st.json(cv_processor.relevance_stats())
+                st.markdown("### DOCX Render Cache")
+                st.json(cv_processor.docx_stats())
+            if job_finder:
+                st.markdown("### Job Posting Cache")
+                st.json(job_finder.cache_stats())
             
             st.markdown("### Session State")
             st.json({k: str(v)[:100] for k, v in st.session_state.items()})
             
             if st.button("List Models"):
+                import google.generativeai as genai
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
                 try:
                      models = [m.name for m in genai.list_models()]
                      st.write(models)
@@ -217,12 +266,15 @@ def main_app():
             st.session_state.cv_text = ""
         cv_text = st.session_state.cv_text
         if uploaded_file:
-            # Save temp file to read it
-            with open("temp_resume.pdf", "wb") as f:
-                f.write(uploaded_file.getbuffer())
-            
+            # Extraction is cached by file hash, so reruns with the same upload don't re-parse the PDF
             with st.spinner("Reading CV..."):
-                extracted_text = cv_processor.extract_text("temp_resume.pdf")
+                read_error = "Could not read CV text."
+                try:
+                    # getbuffer() is a view of the upload, so nothing is copied or written to disk
+                    extracted_text = cv_processor.extract_text(uploaded_file.getbuffer())
+                except ValueError as e:
+                    read_error = str(e)
+                    extracted_text = ""
                 if extracted_text:
                     st.session_state.cv_text = extracted_text
                     cv_text = extracted_text
@@ -230,7 +282,7 @@ def main_app():
                     with st.expander("View Extracted Text"):
                         st.text(cv_text[:1000] + "...")
                 else:
-                    st.error("Could not read CV text.")
+                    st.error(read_error)
 
         if cv_text:
             if st.button("Assess CV"):
@@ -381,6 +433,9 @@ def main_app():
                         job_details = job_finder.extract_job_details(job_url)
                         
                         if job_details:
+                            # The corpus counts the posting as fetched; edits below are scored without being stored
+                            if cv_processor:
+                                cv_processor.add_job_description(job_details['description'])
                             st.session_state['generated_job_details'] = job_details
                             st.session_state['has_generated_application'] = True
                             st.session_state['application_job_url'] = job_url
@@ -428,6 +483,16 @@ def main_app():
             job_details['description'] = edited_desc
             job_details['summary'] = summary_text
             
+            # Local BM25 / TF-IDF fit, computed before any Gemini call so unsuitable jobs can be skipped
+            if cv_text and edited_desc:
+                fit = cv_processor.score_job_fit(cv_text, edited_desc, update=False)
+                fit_col, terms_col = st.columns([1, 3])
+                fit_col.metric("Local Job Fit", f"{fit['fit_score']}/100")
+                if fit['top_terms']:
+                    terms_col.markdown("**Matching terms:** " + ", ".join(term for term, _ in fit['top_terms']))
+                if fit['missing_terms']:
+                    terms_col.markdown("**Missing terms:** " + ", ".join(fit['missing_terms']))
+            
             # Tabs for results
             tab1, tab2, tab3 = st.tabs(["Cover Letter", "Tailored CV", "Interview & Contact"])
             
@@ -441,7 +506,11 @@ def main_app():
                          st.session_state['cover_letter'] = None
                     
                     if st.session_state['cover_letter'] is None:
-                        cover_letter = cv_processor.generate_cover_letter(cv_text, job_details)
+                        # Stream tokens as they arrive, then swap in the editable text area
+                        stream_box = st.empty()
+                        with stream_box.container():
+                            cover_letter = st.write_stream(cv_processor.generate_cover_letter_stream(cv_text, job_details))
+                        stream_box.empty()
                         st.session_state['cover_letter'] = cover_letter
                         st.session_state['cl_job_url'] = job_url
                     else:
@@ -477,11 +546,13 @@ def main_app():
                     if st.button("🔄 Regenerate", help="Start fresh and regenerate the CV"):
                         st.session_state['tailored_cv'] = None
                         st.session_state['cv_validation'] = None
+                        # Skip the response cache so the model produces a new version
+                        st.session_state['regenerate_cv'] = True
                         st.rerun()
                 
                 try:
-                    # Trim description for CV tailoring
-                    safe_description = job_details['description'][:2000]
+                    # CVProcessor trims each prompt part to its token budget
+                    safe_description = job_details['description']
                     # Get additional info from session state if available
                     additional_info = st.session_state.get('additional_cv_info', None)
                     
@@ -492,8 +563,15 @@ def main_app():
                     
                     # Generate CV only if not already generated
                     if st.session_state['tailored_cv'] is None:
-                        with st.spinner("Generating tailored CV..."):
-                            new_cv = cv_processor.tailor_cv(cv_text, safe_description, additional_info)
+                        bypass_cache = st.session_state.pop('regenerate_cv', False)
+                        stream_box = st.empty()
+                        with stream_box.container():
+                            st.caption("Generating tailored CV...")
+                            new_cv = st.write_stream(
+                                cv_processor.tailor_cv_stream(cv_text, safe_description, additional_info, bypass_cache=bypass_cache)
+                            )
+                        stream_box.empty()
+                        with st.spinner("Checking ATS compatibility..."):
                             st.session_state['tailored_cv'] = new_cv
                             # Run ATS validation
                             validation_report = cv_processor.validate_ats_compatibility(new_cv, safe_description)
@@ -521,6 +599,10 @@ def main_app():
                             st.markdown("**Recommendations:**")
                             for rec in validation_report['recommendations']:
                                 st.markdown(f"- {rec}")
+                        
+                        missing_keywords = validation_report.get('keywords', {}).get('missing')
+                        if missing_keywords:
+                            st.markdown("**Job description keywords not found in your CV:** " + ", ".join(missing_keywords[:20]))
                     
 
                     # Auto-improvement prompt if score < 90
@@ -528,9 +610,9 @@ def main_app():
                         st.markdown("---")
                         
                         if st.button("🚀 Auto-Improve CV to Reach Green (90+)", type="primary", key="improve_cv_btn"):
-                            with st.spinner("Optimizing your CV for ATS... This may take 10-15 seconds..."):
+                            with st.spinner("Optimizing the sections that need work..."):
                                 try:
-                                    improved_cv = cv_processor.improve_cv_for_ats(new_cv, validation_report)
+                                    improved_cv = cv_processor.improve_cv_for_ats(new_cv, validation_report, job_description=safe_description)
                                     
                                     # Re-validate improved CV
                                     new_validation = cv_processor.validate_ats_compatibility(improved_cv, safe_description)
@@ -603,13 +685,13 @@ def main_app():
                             st.error("Tailored CV generation returned empty result.")
                     # Prepare ATS-friendly filename: FirstName_LastName_JobTitle_CV
                     import re
-                    # Extract name from CV (first line after # header)
-                    name_match = re.search(r'^#\s+(.+)$', new_cv, re.MULTILINE)
+                    from cv_document import parse_cv
+                    # Extract name from CV (first "# " header)
+                    cv_name = parse_cv(new_cv).name
                     candidate_name = "Candidate"
-                    if name_match:
-                        candidate_name = name_match.group(1).strip()
+                    if cv_name:
                         # Clean name: remove special chars, keep only letters and spaces
-                        candidate_name = re.sub(r'[^a-zA-Z\s]', '', candidate_name)
+                        candidate_name = re.sub(r'[^a-zA-Z\s]', '', cv_name)
                         # Convert to FirstName_LastName format
                         candidate_name = "_".join(candidate_name.split()[:2])  # First two words
                     
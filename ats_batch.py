@@ -0,0 +1,103 @@
+from cv_signals import extract_job_keywords
+from keyword_matcher import KeywordMatcher
+
+# numpy and scipy are imported on first use; only batch scoring needs them
+
+
+class ATSBatchScores:
+    """
+    ATS scores for every (CV, job description) pair.
+    `scores` and `match_rates` are (n_cvs, n_jobs) arrays; the full report (with
+    recommendations) for a pair is built on demand with the per-pair validator.
+    """
+
+    def __init__(self, processor, cv_texts, job_descriptions, scores, match_rates):
+        self._processor = processor
+        self.cv_texts = cv_texts
+        self.job_descriptions = job_descriptions
+        self.scores = scores
+        self.match_rates = match_rates
+
+    @property
+    def passed(self):
+        return self.scores >= 70
+
+    def grades(self):
+        """Letter grades as a (n_cvs, n_jobs) array, same bands as validate_ats_compatibility."""
+        import numpy as np
+        scores = self.scores
+        return np.select([scores >= 90, scores >= 80, scores >= 70, scores >= 60], ["A", "B", "C", "D"], "F")
+
+    def report(self, cv_index, job_index):
+        """The full validate_ats_compatibility report for one pair."""
+        return self._processor.validate_ats_compatibility(self.cv_texts[cv_index], self.job_descriptions[job_index])
+
+    def recommendations(self, cv_index, job_index):
+        return self.report(cv_index, job_index)["recommendations"]
+
+    def top_jobs(self, cv_index, limit=5):
+        """Indexes of the best-scoring job descriptions for a CV, best first."""
+        import numpy as np
+        return [int(j) for j in np.argsort(-self.scores[cv_index], kind="stable")[:limit]]
+
+    def top_cvs(self, job_index, limit=5):
+        """Indexes of the best-scoring CVs for a job description, best first."""
+        import numpy as np
+        return [int(i) for i in np.argsort(-self.scores[:, job_index], kind="stable")[:limit]]
+
+
+def score_ats_batch(processor, cv_texts, job_descriptions):
+    """
+    Scores every CV against every job description, as validate_ats_compatibility would.
+    Each CV and JD is tokenized once: JD keywords and the keywords found in each CV become
+    sparse incidence matrices, and one sparse product gives the matched-keyword counts for
+    all pairs. Only the keyword check depends on the pair; the structural checks are scored
+    once per CV and broadcast across the job descriptions.
+    """
+    import numpy as np
+    from scipy import sparse
+    from cv_processor import KEYWORD_SCORE_BANDS, NO_JOB_DESCRIPTION_POINTS
+
+    cv_texts = list(cv_texts)
+    job_descriptions = list(job_descriptions)
+
+    # JD x keyword incidence matrix over the union of every JD's keywords
+    columns = {}
+    rows, cols = [], []
+    for j, job_description in enumerate(job_descriptions):
+        if not job_description:
+            continue
+        for keyword in extract_job_keywords(job_description):
+            rows.append(j)
+            cols.append(columns.setdefault(keyword, len(columns)))
+    job_terms = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(job_descriptions), len(columns))
+    )
+
+    # One automaton for all keywords: a single pass per CV finds every JD's keywords at once
+    matcher = KeywordMatcher(columns)
+    rows, cols = [], []
+    structure = np.empty(len(cv_texts), dtype=np.int64)
+    for i, cv_text in enumerate(cv_texts):
+        for keyword in matcher.find(cv_text):
+            rows.append(i)
+            cols.append(columns[keyword])
+        # Everything but the keyword check depends on the CV alone
+        structure[i] = processor.validate_ats_compatibility(cv_text)["score"] - NO_JOB_DESCRIPTION_POINTS
+    cv_terms = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(cv_texts), len(columns))
+    )
+
+    matched = (cv_terms @ job_terms.T).toarray()
+    keyword_counts = np.asarray(job_terms.sum(axis=1)).ravel()
+    match_rates = matched / np.maximum(keyword_counts, 1)
+
+    conditions = [match_rates >= min_rate for min_rate, _, _ in KEYWORD_SCORE_BANDS]
+    keyword_points = np.select(conditions, [points for _, points, _ in KEYWORD_SCORE_BANDS], 0)
+    has_job_description = np.array([bool(jd) for jd in job_descriptions], dtype=bool)
+    keyword_points = np.where(has_job_description, keyword_points, NO_JOB_DESCRIPTION_POINTS)
+
+    scores = structure[:, None] + keyword_points
+    return ATSBatchScores(processor, cv_texts, job_descriptions, scores, match_rates)
@@ -0,0 +1,99 @@
+"""
+Benchmark for batch ATS scoring (CVProcessor.score_ats_batch) against the per-pair loop.
+
+Scores a synthetic pool of CVs against a set of job descriptions, then times the old
+approach - validate_ats_compatibility in a Python double loop - on a sample of the pairs
+and extrapolates it to the full matrix. The sampled pairs are also checked to score the
+same both ways. No API calls are made; numpy and scipy must be installed.
+
+Usage:
+    python benchmarks/bench_ats_batch.py [--cvs 1000] [--jobs 100] [--sample 2000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+SKILLS = ["Python", "Java", "Go", "Rust", "AWS", "GCP", "Azure", "Docker", "Kubernetes", "Terraform",
+          "PostgreSQL", "MySQL", "Redis", "Kafka", "Spark", "Airflow", "React", "TypeScript", "Node.js",
+          "GraphQL", "REST APIs", "Machine Learning", "Data Engineering", "CI/CD", "Linux", "SQL"]
+TITLES = ["Backend Engineer", "Data Engineer", "Platform Engineer", "Frontend Developer", "ML Engineer"]
+
+
+def make_cv(rng, index):
+    skills = rng.sample(SKILLS, 8)
+    lines = [
+        f"# Candidate {index}",
+        f"candidate{index}@example.com | (555) 123-{1000 + index % 9000} | linkedin.com/in/c{index} | Austin, TX",
+        "",
+        "## Professional Summary",
+        f"{rng.choice(TITLES)} with {3 + index % 10}+ years building {skills[0]} services.",
+        "",
+        "## Skills",
+        ", ".join(skills),
+        "",
+        "## Work Experience",
+    ]
+    for role in range(rng.randint(1, 6)):
+        lines += [
+            f"### {rng.choice(TITLES)} | Company {role} | 2015 - 2020",
+            f"- Led a team of {2 + role} engineers shipping {skills[role % 8]} features used by {10 + role}% of users",
+            f"- Developed {skills[(role + 1) % 8]} pipelines, reducing costs by ${1000 * (role + 1)}",
+            f"- Implemented {skills[(role + 2) % 8]} tooling and Improved reliability",
+            "",
+        ]
+    lines += ["## Education", "BSc Computer Science | State University | 2012"]
+    return "\n".join(lines)
+
+
+def make_job(rng, index):
+    skills = rng.sample(SKILLS, 6)
+    return (f"{rng.choice(TITLES)} - Remote\n"
+            f"We need strong {skills[0]}, {skills[1]} and {skills[2]} experience.\n"
+            f"You will work with {skills[3]}, {skills[4]} and {skills[5]} on the Platform team.\n"
+            f"Req {index}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cvs", type=int, default=1000)
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--sample", type=int, default=2000, help="Pairs scored with the per-pair loop")
+    args = parser.parse_args()
+
+    from cv_processor import CVProcessor
+    from cv_signals import scan_cv
+    from keyword_matcher import clear_keyword_caches
+    from cv_document import clear_document_cache
+
+    rng = random.Random(0)
+    cvs = [make_cv(rng, i) for i in range(args.cvs)]
+    jobs = [make_job(rng, j) for j in range(args.jobs)]
+    processor = CVProcessor()
+
+    start = time.perf_counter()
+    batch = processor.score_ats_batch(cvs, jobs)
+    batch_seconds = time.perf_counter() - start
+
+    scan_cv.cache_clear()
+    clear_keyword_caches()
+    clear_document_cache()
+    pairs = [(rng.randrange(args.cvs), rng.randrange(args.jobs)) for _ in range(args.sample)]
+    start = time.perf_counter()
+    loop_scores = [processor.validate_ats_compatibility(cvs[i], jobs[j])["score"] for i, j in pairs]
+    loop_seconds = (time.perf_counter() - start) / len(pairs) * args.cvs * args.jobs
+
+    mismatches = sum(1 for (i, j), score in zip(pairs, loop_scores) if batch.scores[i, j] != score)
+    print(f"{args.cvs} CVs x {args.jobs} jobs = {args.cvs * args.jobs} pairs")
+    print(f"batch:                {batch_seconds:8.2f} s")
+    print(f"per-pair loop (est.): {loop_seconds:8.2f} s")
+    print(f"sampled pairs checked: {len(pairs)}, mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
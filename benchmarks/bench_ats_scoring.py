@@ -0,0 +1,113 @@
+"""
+Benchmark for the rule-based CV checks (identify_cv_gaps, validate_cv, validate_ats_compatibility).
+
+Times one "rerun" - all three checks on the same CV, as app.py does - over a set of
+synthetic CVs of increasing size. "cold" clears every cache (including the JD's keyword
+automaton) before each rerun, "edit" re-scores a CV that changed since the last rerun (the
+user is typing; the JD automaton is cached) and "warm" is a rerun with an unchanged CV.
+No API calls are made.
+
+Usage:
+    python benchmarks/bench_ats_scoring.py [--repeat 200]
+To compare against an older revision, run it from a checkout of that revision.
+"""
+import os
+import sys
+import time
+import argparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+JOB_DESCRIPTION = """
+Senior Python Engineer - Remote
+We are looking for an engineer with Python, AWS, Docker and Kubernetes experience.
+You will work with the Data Platform team on Machine Learning pipelines, REST APIs and SQL.
+Experience with CI/CD, Terraform and Google Cloud Platform is a plus.
+"""
+
+
+def make_cv(roles):
+    lines = [
+        "# Jane Doe",
+        "jane.doe@example.com | (555) 123-4567 | linkedin.com/in/janedoe | Austin, TX",
+        "",
+        "## Professional Summary",
+        "Backend engineer with 8+ years building Python services on AWS, leading teams and shipping data products.",
+        "",
+        "## Skills",
+        "Python, AWS, Docker, Kubernetes, SQL, Terraform, REST APIs, Machine Learning",
+        "",
+        "## Work Experience",
+    ]
+    for i in range(roles):
+        lines += [
+            f"### Senior Engineer | Company {i} | 20{10 + i % 10} - 20{11 + i % 10}",
+            f"- Led a team of {3 + i % 5} engineers to deliver a data platform used by 40% of customers",
+            f"- Developed Python microservices on AWS, reducing latency by {10 + i % 50}%",
+            "- Implemented CI/CD pipelines with Docker and Kubernetes, saving $20000 per year",
+            "- Improved test coverage and Designed REST APIs consumed by 10+ partner teams",
+            "",
+        ]
+    lines += ["## Education", "BSc Computer Science | University of Texas | 2012"]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="Reruns timed per CV size")
+    args = parser.parse_args()
+
+    from cv_processor import CVProcessor
+    caches = []
+    try:
+        from cv_signals import scan_cv
+        caches.append(scan_cv.cache_clear)
+        from keyword_matcher import clear_keyword_caches
+        caches.append(clear_keyword_caches)
+        from cv_document import clear_document_cache
+        caches.append(clear_document_cache)
+    except ImportError:
+        # Older revisions don't have these caches
+        pass
+
+    def clear_cache():
+        for clear in caches:
+            clear()
+
+    processor = CVProcessor()
+
+    def rerun(cv_text):
+        processor.identify_cv_gaps(cv_text)
+        processor.validate_cv(cv_text)
+        processor.validate_ats_compatibility(cv_text, JOB_DESCRIPTION)
+
+    print(f"{'roles':>6} {'chars':>8} {'cold us/rerun':>14} {'edit us/rerun':>14} {'warm us/rerun':>14}")
+    for roles in (3, 10, 30, 100):
+        cv_text = make_cv(roles)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            clear_cache()
+            rerun(cv_text)
+        cold = (time.perf_counter() - start) / args.repeat * 1e6
+
+        edits = [f"{cv_text}\n- Edit {i}" for i in range(args.repeat)]
+        rerun(cv_text)
+        start = time.perf_counter()
+        for edited in edits:
+            rerun(edited)
+        edit = (time.perf_counter() - start) / args.repeat * 1e6
+
+        rerun(cv_text)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            rerun(cv_text)
+        warm = (time.perf_counter() - start) / args.repeat * 1e6
+
+        print(f"{roles:>6} {len(cv_text):>8} {cold:>14.1f} {edit:>14.1f} {warm:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
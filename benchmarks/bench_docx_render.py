@@ -0,0 +1,76 @@
+"""
+Benchmark for DOCX export (CVProcessor.generate_docx's renderer and docx_utils.create_docx_from_markdown).
+
+Renders a typical two-page CV repeatedly and reports renders per second and the peak
+memory (tracemalloc) of a single render. "cold" renders with the rendered-bytes cache
+cleared every time (the styled template is still reused, as in a long-running process);
+"cached" is the same CV again, as on a Streamlit rerun or a repeated download.
+No API calls are made.
+
+Usage:
+    python benchmarks/bench_docx_render.py [--repeat 100] [--roles 6]
+To compare against an older revision, run it from a checkout of that revision.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+from bench_ats_scoring import make_cv
+
+
+def measure(render, clear, repeat):
+    render()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        clear()
+        render()
+    per_second = repeat / (time.perf_counter() - start)
+
+    clear()
+    tracemalloc.start()
+    render()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_second, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=100, help="Renders timed per row")
+    parser.add_argument("--roles", type=int, default=6, help="Work experience entries (6 is about two pages)")
+    args = parser.parse_args()
+
+    from cv_processor import CVProcessor
+    from docx_utils import create_docx_from_markdown
+    try:
+        from docx_renderer import get_docx_renderer
+        clear_cache = get_docx_renderer().clear
+    except ImportError:
+        # Older revisions render from scratch every time
+        clear_cache = lambda: None
+
+    processor = CVProcessor()
+    cv_text = make_cv(args.roles)
+    path = os.path.join(tempfile.mkdtemp(), "bench.docx")
+    exporters = [
+        ("generate_docx", lambda: processor.generate_docx(cv_text, path)),
+        ("create_docx_from_markdown", lambda: create_docx_from_markdown(cv_text).getvalue()),
+    ]
+
+    print(f"CV: {len(cv_text)} chars, {args.roles} roles")
+    print(f"{'exporter':<27} {'mode':<7} {'renders/s':>10} {'peak KiB':>10}")
+    for name, render in exporters:
+        for mode, clear in (("cold", clear_cache), ("cached", lambda: None)):
+            per_second, peak = measure(render, clear, args.repeat)
+            print(f"{name:<27} {mode:<7} {per_second:>10.1f} {peak / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
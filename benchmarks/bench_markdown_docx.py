@@ -0,0 +1,80 @@
+"""
+Benchmark for the Markdown-to-DOCX engine on large and pathological inputs.
+
+Renders each input through both exporters (generate_docx's CV layout and
+create_docx_from_markdown's plain layout) with the rendered-bytes cache cleared, and
+reports milliseconds per render and per 1000 lines. Inputs:
+  cv          a typical two-page CV
+  bullets     one section with thousands of bullets
+  emphasis    deeply mixed and nested **bold** / *italic* / ***both*** on every line
+  unbalanced  stray and unbalanced '*' runs (each should stay literal, in linear time)
+No API calls are made.
+
+Usage:
+    python benchmarks/bench_markdown_docx.py [--repeat 5] [--lines 5000]
+To compare against an older revision, run it from a checkout of that revision.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+from bench_ats_scoring import make_cv
+
+
+def make_inputs(lines):
+    header = "# Jane Doe\njane.doe@example.com | (555) 123-4567\n\n"
+    bullets = header + "## Work Experience\n" + "\n".join(
+        f"- Delivered project {i} with **Python** and *AWS*, saving {i % 90}%" for i in range(lines)
+    )
+    emphasis = header + "## Projects\n" + "\n".join(
+        f"- ***Lead*** of **team *{i}* with *nested **bold {i}** inside*** and *a **b *c* d** e* {i}"
+        for i in range(lines)
+    )
+    unbalanced = header + "## Notes\n" + "\n".join(
+        ("**x* " * 40) + ("* " * 20) + "5 * 3 ** 2 *" for _ in range(lines // 10)
+    )
+    return [("cv", make_cv(6)), ("bullets", bullets), ("emphasis", emphasis), ("unbalanced", unbalanced)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Renders timed per input and exporter")
+    parser.add_argument("--lines", type=int, default=5000, help="Lines in the large inputs")
+    args = parser.parse_args()
+
+    from cv_processor import CVProcessor
+    from docx_utils import create_docx_from_markdown
+    try:
+        from docx_renderer import get_docx_renderer
+        clear_cache = get_docx_renderer().clear
+    except ImportError:
+        # Older revisions render from scratch every time
+        clear_cache = lambda: None
+
+    processor = CVProcessor()
+    path = os.path.join(tempfile.mkdtemp(), "bench.docx")
+    exporters = [
+        ("generate_docx", lambda text: processor.generate_docx(text, path)),
+        ("create_docx_from_markdown", lambda text: create_docx_from_markdown(text).getvalue()),
+    ]
+
+    print(f"{'input':<11} {'lines':>6} {'exporter':<27} {'ms/render':>10} {'ms/1k lines':>12}")
+    for name, text in make_inputs(args.lines):
+        line_count = text.count('\n') + 1
+        for exporter, render in exporters:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                clear_cache()
+                render(text)
+            ms = (time.perf_counter() - start) / args.repeat * 1000
+            print(f"{name:<11} {line_count:>6} {exporter:<27} {ms:>10.1f} {ms / line_count * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Cold-start benchmark for the app entry points.
+
+Runs each entry point's imports in a fresh interpreter with `python -X importtime`
+and reports the wall-clock time plus the most expensive top-level modules, so
+regressions in startup (e.g. a heavy SDK imported at module top) are easy to spot.
+
+Usage:
+    python benchmarks/bench_startup.py [--top 10] [--repeat 3] [--budget-ms 800]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What each entry point imports before it can serve its first request/render.
+# app.py can't be imported outside `streamlit run`, so we import what its first render needs.
+ENTRY_POINTS = {
+    "app.py": "import streamlit, dotenv, cv_processor, job_finder, google_handler",
+    "main.py": "import main",
+    "fastapi_backup.py": "import fastapi_backup",
+}
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(code, exclude=()):
+    """Returns (wall_ms, {top_level_module: cumulative_ms}, error) for one fresh interpreter."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        cumulative_us, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        # One leading space means the module was imported directly by the entry point
+        if len(indent) <= 1 and name not in exclude:
+            modules[name] = modules.get(name, 0) + cumulative_us / 1000
+
+    error = None
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"
+    return wall_ms, modules, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=10, help="Number of modules to list per entry point")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per entry point (the fastest is reported)")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Exit with status 1 if any entry point's import time exceeds this")
+    args = parser.parse_args()
+
+    # Modules the interpreter loads before running any code are not the entry point's cost
+    baseline_ms, baseline_modules, _ = measure("pass")
+    print(f"bare interpreter: {baseline_ms:.1f} ms")
+
+    over_budget = []
+    for entry, code in ENTRY_POINTS.items():
+        runs = [measure(code, exclude=baseline_modules) for _ in range(max(1, args.repeat))]
+        wall_ms, modules, error = min(runs, key=lambda r: r[0])
+        import_ms = sum(modules.values())
+
+        print(f"\n== {entry} ==")
+        print(f"interpreter + imports: {wall_ms:8.1f} ms   imports: {import_ms:8.1f} ms")
+        if error:
+            print(f"  (import failed: {error})")
+        for name, ms in sorted(modules.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"  {ms:8.1f} ms  {name}")
+
+        if args.budget_ms is not None and import_ms > args.budget_ms:
+            over_budget.append(entry)
+
+    if over_budget:
+        print(f"\nOver the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
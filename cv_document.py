@@ -0,0 +1,179 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# Block kinds, by the Markdown marker that starts the (stripped) line
+TITLE = 'title'            # "# Name"
+SECTION = 'section'        # "## Work Experience"
+SUBSECTION = 'subsection'  # "### Engineer | Company | 2020 - Present"
+BULLET = 'bullet'          # "- ..." or "* ..."
+TEXT = 'text'
+
+_MARKERS = (('### ', SUBSECTION), ('## ', SECTION), ('# ', TITLE), ('- ', BULLET), ('* ', BULLET))
+
+
+@dataclass(frozen=True, slots=True)
+class Block:
+    """One non-blank line of the CV, classified once."""
+    kind: str
+    # Line content without its Markdown marker, stripped
+    text: str
+    # Index into CVDocument.lines
+    line_no: int
+    # The line as written, for checks that care about raw layout (e.g. indented bullets)
+    raw: str
+
+
+@dataclass(frozen=True, slots=True)
+class Role:
+    """A "### " entry inside a section (a job, a degree, a project) and the bullets under it."""
+    title: str
+    bullets: tuple
+    blocks: tuple
+
+
+@dataclass(frozen=True, slots=True)
+class Section:
+    """A "## " section: its heading line as written, its body lines as written, and their blocks."""
+    heading: str
+    title: str
+    lines: tuple
+    blocks: tuple
+    roles: tuple
+
+    @property
+    def bullets(self):
+        return tuple(block.text for block in self.blocks if block.kind == BULLET)
+
+    @property
+    def body_text(self):
+        return '\n'.join(self.lines).strip()
+
+
+@dataclass(frozen=True, slots=True)
+class Header:
+    """Everything above the first section: the raw lines and the name/contact entries shown on top of the CV."""
+    lines: tuple
+    blocks: tuple
+    # Non-blank lines with "# " and "**" removed; the first is normally the name
+    entries: tuple
+
+
+@dataclass(frozen=True, slots=True)
+class CVDocument:
+    """A Markdown CV parsed into header, sections, roles and bullets. Shared between consumers; treat as read-only."""
+    text: str
+    lines: tuple
+    blocks: tuple
+    header: Header
+    sections: tuple
+
+    @property
+    def name(self):
+        """Text of the first "# " line anywhere in the CV, or "" if there is none."""
+        for block in self.blocks:
+            if block.kind == TITLE:
+                return block.text
+        return ""
+
+    def find_section(self, *keywords):
+        """First section whose title contains any of `keywords` (case-insensitive), or None."""
+        for section in self.sections:
+            title = section.title.lower()
+            if any(keyword.lower() in title for keyword in keywords):
+                return section
+        return None
+
+
+def _classify(line_no, raw):
+    line = raw.strip()
+    for marker, kind in _MARKERS:
+        if line.startswith(marker):
+            return Block(kind, line[len(marker):].strip(), line_no, raw)
+    return Block(TEXT, line, line_no, raw)
+
+
+def _roles(blocks):
+    roles = []
+    current = None
+    for block in blocks:
+        if block.kind == SUBSECTION:
+            current = (block.text, [])
+            roles.append(current)
+        elif current is not None:
+            current[1].append(block)
+    return tuple(
+        Role(title, tuple(b.text for b in role_blocks if b.kind == BULLET), tuple(role_blocks))
+        for title, role_blocks in roles
+    )
+
+
+def _parse(text):
+    lines = tuple(text.split('\n'))
+    blocks = []
+    header_end = len(lines)
+    section_starts = []
+    for line_no, raw in enumerate(lines):
+        if not raw.strip():
+            continue
+        block = _classify(line_no, raw)
+        blocks.append(block)
+        if block.kind == SECTION:
+            if not section_starts:
+                header_end = line_no
+            section_starts.append(len(blocks) - 1)
+
+    header_blocks = tuple(blocks[:section_starts[0]] if section_starts else blocks)
+    header = Header(
+        lines=lines[:header_end],
+        blocks=header_blocks,
+        entries=tuple(b.raw.strip().replace('# ', '').replace('**', '').strip() for b in header_blocks),
+    )
+
+    sections = []
+    bounds = section_starts + [len(blocks)]
+    for start, end in zip(bounds, bounds[1:]):
+        heading = blocks[start]
+        body_end = blocks[end].line_no if end < len(blocks) else len(lines)
+        body_blocks = tuple(blocks[start + 1:end])
+        sections.append(Section(
+            heading=heading.raw,
+            title=heading.text,
+            lines=lines[heading.line_no + 1:body_end],
+            blocks=body_blocks,
+            roles=_roles(body_blocks),
+        ))
+
+    return CVDocument(text=text, lines=lines, blocks=tuple(blocks), header=header, sections=tuple(sections))
+
+
+_documents = OrderedDict()
+_documents_lock = threading.Lock()
+_MAX_DOCUMENTS = 64
+
+
+def parse_cv(cv_text):
+    """
+    Parses a Markdown CV into a CVDocument, cached by a SHA-256 of the text.
+    The gap/ATS checks, the section-scoped ATS improvement, both DOCX exporters and the
+    download filename all read the same parse, so a CV is only scanned once per edit.
+    """
+    key = hashlib.sha256(cv_text.encode('utf-8')).hexdigest()
+    with _documents_lock:
+        document = _documents.get(key)
+        if document is not None:
+            _documents.move_to_end(key)
+            return document
+
+    document = _parse(cv_text)
+    with _documents_lock:
+        _documents[key] = document
+        while len(_documents) > _MAX_DOCUMENTS:
+            _documents.popitem(last=False)
+    return document
+
+
+def clear_document_cache():
+    with _documents_lock:
+        _documents.clear()
@@ -1,185 +1,81 @@
 import os
-import google.generativeai as genai
-import PyPDF2
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-import google.api_core.exceptions
+import asyncio
+import functools
+import threading
+from llm_cache import get_llm_cache
+from gemini_scheduler import get_scheduler
+from token_budget import TokenBudget
+from single_flight import get_single_flight
+from extraction_cache import get_extraction_cache
+from pdf_extractor import get_pdf_extractor, PDFExtractionError
+from cv_signals import scan_cv
+from cv_document import parse_cv
+from keyword_matcher import get_keyword_matcher
 
-class CVProcessor:
-    def __init__(self):
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
-        
-        genai.configure(api_key=api_key)
-        
-        # Configure safety settings to prevent blocking professional CV content
-        from google.generativeai.types import HarmCategory, HarmBlockThreshold
-        
-        safety_settings = [
-            {
-                "category": HarmCategory.HARM_CATEGORY_HARASSMENT,
-                "threshold": HarmBlockThreshold.BLOCK_NONE,
-            },
-            {
-                "category": HarmCategory.HARM_CATEGORY_HATE_SPEECH,
-                "threshold": HarmBlockThreshold.BLOCK_NONE,
-            },
-            {
-                "category": HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
-                "threshold": HarmBlockThreshold.BLOCK_NONE,
-            },
-            {
-                "category": HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
-                "threshold": HarmBlockThreshold.BLOCK_NONE,
-            },
-        ]
-        
-        # Switch to 2.0-flash-exp (available and free tier)
-        # Switch to gemini-flash-latest (Explicitly available in user list)
-        self.model = genai.GenerativeModel(
-            'gemini-flash-latest',
-            safety_settings=safety_settings
-        )
+# google.generativeai, google.api_core, tenacity and PyPDF2 are imported on first use
+# so that importing this module (and the entry points that use it) stays cheap.
 
-    def extract_text(self, file_path):
-        """Extracts text from PDF."""
-        try:
-            text = ""
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                for page in reader.pages:
-                    text += page.extract_text()
-            return text
-        except Exception as e:
-            print(f"Error reading PDF: {e}")
-            return ""
+class PDFTooLargeError(PDFExtractionError):
+    """Raised when an uploaded CV is over the configured size limit."""
 
-    @retry(
-        retry=retry_if_exception_type(google.api_core.exceptions.ResourceExhausted),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    def assess_cv(self, cv_text):
-        """Assess the CV against general best practices."""
-        prompt = f"""
-        Act as an expert career coach. Review the following CV and provide a brief assessment.
-        Highlight 3 strengths and 3 areas for improvement.
-        
-        CV Content:
-        {cv_text}
-        """
-        response = self.model.generate_content(prompt)
-        return response.text
-    
-    def identify_cv_gaps(self, cv_text):
-        """
-        Identifies missing or weak elements in the CV.
-        Returns a dict with gaps and user-friendly prompts.
-        """
-        import re
-        
-        gaps = {
-            'has_gaps': False,
-            'missing_elements': [],
-            'prompts': {}
-        }
-        
-        # Check for phone number
-        has_phone = bool(re.search(r'\(?\d{3}\)?[-\.\s]?\d{3}[-\.\s]?\d{4}', cv_text))
-        if not has_phone:
-            gaps['missing_elements'].append('phone')
-            gaps['prompts']['phone'] = "📞 Phone Number (e.g., (555) 123-4567)"
-            gaps['has_gaps'] = True
-        
-        # Check for LinkedIn
-        has_linkedin = bool(re.search(r'linkedin\.com/in/[\w-]+', cv_text, re.IGNORECASE))
-        if not has_linkedin:
-            gaps['missing_elements'].append('linkedin')
-            gaps['prompts']['linkedin'] = "🔗 LinkedIn Profile URL (e.g., https://linkedin.com/in/yourname)"
-            gaps['has_gaps'] = True
-        
-        # Check for location
-        has_location = bool(re.search(r'\b[A-Z][a-z]+,\s*[A-Z]{2}\b', cv_text))
-        if not has_location:
-            gaps['missing_elements'].append('location')
-            gaps['prompts']['location'] = "📍 Location (e.g., New York, NY or London, UK)"
-            gaps['has_gaps'] = True
-        
-        # Check for professional summary
-        has_summary = bool(re.search(r'##\s*(Professional\s+)?Summary', cv_text, re.IGNORECASE))
-        summary_text = ""
-        if has_summary:
-            summary_match = re.search(r'##\s*(Professional\s+)?Summary\s*\n(.+?)(?=\n##|\Z)', cv_text, re.IGNORECASE | re.DOTALL)
-            if summary_match:
-                summary_text = summary_match.group(2).strip()
-        
-        if not has_summary or len(summary_text) < 50:
-            gaps['missing_elements'].append('summary')
-            gaps['prompts']['summary'] = "💼 Professional Summary (Brief overview of your career and goals)"
-            gaps['has_gaps'] = True
-        
-        # Check for skills section
-        has_skills = bool(re.search(r'##\s*(Skills|Core\s+Competencies|Technical\s+Skills)', cv_text, re.IGNORECASE))
-        if not has_skills:
-            gaps['missing_elements'].append('skills')
-            gaps['prompts']['skills'] = "🎯 Key Skills (Comma-separated, e.g., Python, Project Management, Communication)"
-            gaps['has_gaps'] = True
-        
-        # Check for Work Experience
-        # Relaxed regex: Look for "Work Experience" or "Professional Experience" on its own line (approx)
-        has_work_exp = bool(re.search(r'(^|\n)\s*(Work\s+Experience|Professional\s+Experience|Employment\s+History)', cv_text, re.IGNORECASE))
-        if not has_work_exp:
-             gaps['missing_elements'].append('work_experience')
-             gaps['prompts']['work_experience'] = "💼 Work Experience (e.g., Job Title | Company | Dates | Key Responsibilities)"
-             gaps['has_gaps'] = True
-
-        # Check for Education
-        has_education = bool(re.search(r'(^|\n)\s*(Education|Academic\s+Background)', cv_text, re.IGNORECASE))
-        if not has_education:
-             gaps['missing_elements'].append('education')
-             gaps['prompts']['education'] = "🎓 Education (e.g., Degree | University | Year)"
-             gaps['has_gaps'] = True
-
-        # Check for quantifiable achievements
-        numbers_count = len(re.findall(r'\d+%|\$\d+|\d+\+', cv_text))
-        if numbers_count < 3:
-            gaps['missing_elements'].append('achievements')
-            gaps['prompts']['achievements'] = "📊 Key Achievements (Include numbers/metrics, e.g., 'Increased sales by 30%')"
-            gaps['has_gaps'] = True
-        
-        return gaps
 
-    @retry(
-        retry=retry_if_exception_type(google.api_core.exceptions.ResourceExhausted),
+# ATS keyword check: (minimum match rate, points, recommendation), best band first.
+# Shared with the batch scorer (ats_batch.py) so both score identically.
+KEYWORD_SCORE_BANDS = (
+    (0.5, 20, None),
+    (0.3, 15, "⚠️ Include more keywords from job description"),
+    (0.0, 5, "❌ Low keyword match with job description"),
+)
+NO_JOB_DESCRIPTION_POINTS = 10
+
+
+def _quota_error():
+    """Returns the exception class Gemini raises when the quota is exhausted (HTTP 429)."""
+    from google.api_core.exceptions import ResourceExhausted
+    return ResourceExhausted
+
+
+@functools.lru_cache(maxsize=None)
+def _tenacity_retrying(fn):
+    from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+    return retry(
+        retry=retry_if_exception_type(_quota_error()),
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    def tailor_cv(self, cv_text, job_description, additional_info=None):
-        """Rewrites the CV to match the job description with ATS optimization."""
-        
-        # Format additional information if provided
-        additional_info_text = ""
-        if additional_info:
-            additional_info_text = "\\n\\n**ADDITIONAL INFORMATION PROVIDED BY USER:**\\n"
-            additional_info_text += "The user has provided the following additional information to enhance their CV:\\n"
-            if additional_info.get('phone'):
-                additional_info_text += f"- Phone: {additional_info['phone']}\\n"
-            if additional_info.get('linkedin'):
-                additional_info_text += f"- LinkedIn: {additional_info['linkedin']}\\n"
-            if additional_info.get('location'):
-                additional_info_text += f"- Location: {additional_info['location']}\\n"
-            if additional_info.get('summary'):
-                additional_info_text += f"- Professional Summary: {additional_info['summary']}\\n"
-            if additional_info.get('skills'):
-                additional_info_text += f"- Additional Skills: {additional_info['skills']}\\n"
-            if additional_info.get('achievements'):
-                additional_info_text += f"- Key Achievements: {additional_info['achievements']}\\n"
-            additional_info_text += "\\nPlease incorporate this information naturally into the tailored CV."
-        
-        prompt = f"""
-        Act as an expert CV writer specializing in ATS (Applicant Tracking System) optimization. Tailor the following CV to match the Job Description provided.
-        
-        **CRITICAL INSTRUCTION ON DATES:**
+    )(fn)
+
+
+def _retry_on_quota(fn):
+    """Retries fn (sync or async) up to 3 times with exponential backoff on ResourceExhausted."""
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            return await _tenacity_retrying(fn)(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return _tenacity_retrying(fn)(*args, **kwargs)
+    return wrapper
+
+
+class CVProcessor:
+    MODEL_NAME = 'gemini-flash-latest'
+
+    # Token budget per prompt part, per method. Parts over budget are trimmed by
+    # relevance (see token_budget.trim_to_budget) rather than cut at a fixed prefix.
+    PROMPT_BUDGETS = {
+        'assess_cv': {'cv': 6000},
+        'tailor_cv': {'cv': 6000, 'job_description': 2500, 'additional_info': 600},
+        'improve_cv_for_ats': {'sections': 4000, 'context': 3000, 'recommendations': 400},
+        'interview_questions': {'cv': 4000, 'job_description': 500},
+        'outreach_messages': {'cv': 3000, 'job_description': 400},
+        'cover_letter': {'cv': 4000, 'job_description': 400, 'summary': 400},
+        'application_bundle': {'cv': 6000, 'job_description': 2500, 'additional_info': 600, 'summary': 400},
+    }
+
+    # CV writing rules shared by tailor_cv and generate_application_bundle
+    TAILOR_RULES = """**CRITICAL INSTRUCTION ON DATES:**
         You must PRESERVE all dates exactly as they appear in the original CV. 
         - Do NOT change "Jan 2020" to "January 2020".
         - Do NOT change "2020 - Present" to "2020 - 2023".
@@ -294,7 +190,352 @@ class CVProcessor:
         - ✓ Include quantifiable achievements
         - ✓ Use chronological format
         - ✓ Spell out acronyms on first use
+"""
+
+    def __init__(self):
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY not found in environment variables")
+        self.api_key = api_key
+        
+        # Switch to 2.0-flash-exp (available and free tier)
+        # Switch to gemini-flash-latest (Explicitly available in user list)
+        self.model_name = self.MODEL_NAME
+        self._model = None
+        # The processor is shared across Streamlit sessions, so the model is built exactly once
+        self._model_lock = threading.Lock()
+        
+        # Responses are cached on disk, keyed by model + prompt hash
+        self.cache = get_llm_cache()
+        # Shared RPM/TPM admission control for every Gemini call in this process
+        self.scheduler = get_scheduler()
+        # Per-part prompt budgets and final token accounting
+        self.budget = TokenBudget(self.model_name)
+        # Identical requests already in flight are shared instead of re-sent
+        self.flight = get_single_flight()
+        # Extracted CV text, keyed by a hash of the PDF bytes
+        self.extraction_cache = get_extraction_cache()
+        # Page-streaming parser; long PDFs are split across a process pool
+        self.pdf_extractor = get_pdf_extractor()
+        self.max_pdf_bytes = int(os.getenv("MAX_PDF_BYTES", 10 * 1024 * 1024))
+
+    @property
+    def model(self):
+        """The Gemini model, built (and the SDK imported) on first use."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._build_model()
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
 
+    def _build_model(self):
+        import google.generativeai as genai
+        genai.configure(api_key=self.api_key)
+        
+        # Configure safety settings to prevent blocking professional CV content
+        from google.generativeai.types import HarmCategory, HarmBlockThreshold
+        
+        safety_settings = [
+            {
+                "category": HarmCategory.HARM_CATEGORY_HARASSMENT,
+                "threshold": HarmBlockThreshold.BLOCK_NONE,
+            },
+            {
+                "category": HarmCategory.HARM_CATEGORY_HATE_SPEECH,
+                "threshold": HarmBlockThreshold.BLOCK_NONE,
+            },
+            {
+                "category": HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
+                "threshold": HarmBlockThreshold.BLOCK_NONE,
+            },
+            {
+                "category": HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
+                "threshold": HarmBlockThreshold.BLOCK_NONE,
+            },
+        ]
+        
+        return genai.GenerativeModel(
+            self.model_name,
+            safety_settings=safety_settings
+        )
+
+    def _generate(self, prompt, bypass_cache=False, check_blocked=False, generation_config=None, validate=None):
+        """
+        Sends a prompt to Gemini, serving byte-identical prompts from the response cache.
+        Set bypass_cache=True to force a fresh generation (e.g. "Regenerate").
+        If given, validate(text) is called before caching and should raise on bad output.
+        """
+        key = self.cache.make_key(self.model_name, prompt)
+        if not bypass_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        def call():
+            prompt_tokens = self.budget.check(prompt)
+            self.scheduler.acquire(self.scheduler.estimate_tokens(prompt_tokens))
+            try:
+                response = self.model.generate_content(prompt, generation_config=generation_config)
+            except Exception as e:
+                if isinstance(e, _quota_error()):
+                    self.scheduler.report_throttled()
+                raise
+            if check_blocked:
+                self._raise_if_blocked(response)
+            
+            text = response.text
+            if validate:
+                validate(text)
+            self.cache.set(key, text, self.model_name)
+            return text
+        
+        return self.flight.do(key, call)
+
+    def _raise_if_blocked(self, response):
+        """Raises a user-friendly ValueError if the response has no content."""
+        if response.parts:
+            return
+        
+        # Check finish_reason
+        if hasattr(response, 'candidates') and response.candidates:
+            self._raise_for_finish_reason(response.candidates[0].finish_reason)
+        else:
+            raise ValueError(
+                "The AI model returned an empty response. This might be due to safety filters or API issues. "
+                "Please try again in a moment."
+            )
+
+    def _raise_for_finish_reason(self, finish_reason):
+        reason_name = getattr(finish_reason, 'name', '')
+        if finish_reason == 1 or reason_name == 'SAFETY':
+            raise ValueError(
+                "The AI safety filters blocked the response. This can happen with very long CVs or job descriptions. "
+                "Try shortening your CV or job description, or try again in a moment."
+            )
+        elif finish_reason == 3 or reason_name == 'RECITATION':
+            raise ValueError(
+                "The response was blocked due to potential copyright issues. "
+                "Please ensure your CV and job description don't contain copyrighted material."
+            )
+        else:
+            raise ValueError(
+                f"The AI model couldn't generate a response (finish_reason: {finish_reason}). "
+                "Please try again or contact support."
+            )
+
+    @_retry_on_quota
+    def _open_stream(self, prompt):
+        # The SDK fetches the first chunk eagerly, so quota errors surface here
+        prompt_tokens = self.budget.check(prompt)
+        self.scheduler.acquire(self.scheduler.estimate_tokens(prompt_tokens))
+        try:
+            return self.model.generate_content(prompt, stream=True)
+        except Exception as e:
+            if isinstance(e, _quota_error()):
+                self.scheduler.report_throttled()
+            raise
+
+    def _generate_stream(self, prompt, bypass_cache=False):
+        """
+        Streaming counterpart of _generate: yields text chunks as they arrive.
+        A cache hit is yielded as a single chunk; the full text is cached only
+        once the stream finished cleanly.
+        """
+        key = self.cache.make_key(self.model_name, prompt)
+        if not bypass_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        
+        yield from self.flight.do_stream(key, lambda: self._stream_response(key, prompt))
+
+    def _stream_response(self, key, prompt):
+        response = self._open_stream(prompt)
+        chunks = []
+        for chunk in response:
+            if not chunk.parts:
+                continue
+            chunks.append(chunk.text)
+            yield chunk.text
+        
+        if not chunks:
+            self._raise_if_blocked(response)
+        
+        # A stream can also be cut off part-way by the safety or recitation filters
+        if hasattr(response, 'candidates') and response.candidates:
+            finish_reason = response.candidates[0].finish_reason
+            if getattr(finish_reason, 'name', '') in ('SAFETY', 'RECITATION'):
+                self._raise_for_finish_reason(finish_reason)
+        
+        self.cache.set(key, "".join(chunks), self.model_name)
+
+    def cache_stats(self):
+        """Returns hit/miss counters of the response cache."""
+        return self.cache.stats()
+
+    def scheduler_metrics(self):
+        """Returns queue depth and wait times of the shared quota scheduler."""
+        return self.scheduler.metrics()
+
+    def single_flight_stats(self):
+        """Returns how many calls were coalesced onto an identical in-flight request."""
+        return self.flight.stats()
+
+    def budget_stats(self):
+        """Returns prompt token counts recorded by the token budget."""
+        return self.budget.stats()
+
+    def extract_text(self, source):
+        """
+        Extracts text from a PDF given as a file path, bytes, memoryview or binary file-like object.
+        Uploads are parsed straight from memory (no temp files) and results are cached by file hash.
+        Raises PDFTooLargeError if the file is over MAX_PDF_BYTES and PDFExtractionError if parsing
+        fails in the sandbox (timeout, memory or page limit, malformed file).
+        """
+        try:
+            data = self._read_pdf_source(source)
+        except OSError as e:
+            print(f"Error reading PDF: {e}")
+            return ""
+        return self.extraction_cache.get_or_extract(data, lambda: self._parse_pdf(data))
+
+    def _read_pdf_source(self, source):
+        """Returns the PDF as a bytes-like object, enforcing the size limit before reading everything."""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            data = source
+            size = memoryview(source).nbytes
+        elif hasattr(source, 'read'):
+            # Read at most one byte past the limit so oversized uploads aren't buffered whole
+            data = source.read(self.max_pdf_bytes + 1)
+            size = len(data)
+        else:
+            size = os.path.getsize(source)
+            data = None
+
+        if size > self.max_pdf_bytes:
+            raise PDFTooLargeError(
+                f"The PDF is too large (limit {self.max_pdf_bytes // (1024 * 1024)} MB). Please upload a smaller file."
+            )
+        if data is None:
+            with open(source, 'rb') as file:
+                data = file.read()
+        return data
+
+    def _parse_pdf(self, data):
+        try:
+            return self.pdf_extractor.extract(data)
+        except PDFExtractionError:
+            # Bad or hostile files surface a clear message to the caller
+            raise
+        except Exception as e:
+            print(f"Error reading PDF: {e}")
+            return ""
+
+    def extraction_stats(self):
+        return {
+            "cache": self.extraction_cache.stats(),
+            "parser": self.pdf_extractor.stats(),
+        }
+
+    def _build_assess_prompt(self, cv_text):
+        cv_text = self.budget.fit({'cv': cv_text}, self.PROMPT_BUDGETS['assess_cv'])['cv']
+        return f"""
+        Act as an expert career coach. Review the following CV and provide a brief assessment.
+        Highlight 3 strengths and 3 areas for improvement.
+        
+        CV Content:
+        {cv_text}
+        """
+
+    @_retry_on_quota
+    def assess_cv(self, cv_text, bypass_cache=False):
+        """Assess the CV against general best practices."""
+        prompt = self._build_assess_prompt(cv_text)
+        return self._generate(prompt, bypass_cache=bypass_cache)
+    
+    def identify_cv_gaps(self, cv_text):
+        """
+        Identifies missing or weak elements in the CV.
+        Returns a dict with gaps and user-friendly prompts.
+        """
+        signals = scan_cv(cv_text)
+        
+        gaps = {
+            'has_gaps': False,
+            'missing_elements': [],
+            'prompts': {}
+        }
+        
+        checks = [
+            ('phone', signals.has_phone,
+             "📞 Phone Number (e.g., (555) 123-4567)"),
+            ('linkedin', signals.has_linkedin,
+             "🔗 LinkedIn Profile URL (e.g., https://linkedin.com/in/yourname)"),
+            ('location', signals.has_location,
+             "📍 Location (e.g., New York, NY or London, UK)"),
+            ('summary', len(signals.summary_text) >= 50,
+             "💼 Professional Summary (Brief overview of your career and goals)"),
+            ('skills', signals.has_section("Skills", "Core Competencies", "Technical Skills", loose=True),
+             "🎯 Key Skills (Comma-separated, e.g., Python, Project Management, Communication)"),
+            # Section names on their own line, with or without "##"
+            ('work_experience', signals.has_experience_line,
+             "💼 Work Experience (e.g., Job Title | Company | Dates | Key Responsibilities)"),
+            ('education', signals.has_education_line,
+             "🎓 Education (e.g., Degree | University | Year)"),
+            ('achievements', signals.metric_count >= 3,
+             "📊 Key Achievements (Include numbers/metrics, e.g., 'Increased sales by 30%')"),
+        ]
+        for element, present, prompt in checks:
+            if not present:
+                gaps['missing_elements'].append(element)
+                gaps['prompts'][element] = prompt
+                gaps['has_gaps'] = True
+        
+        return gaps
+
+    @staticmethod
+    def _format_additional_info(additional_info):
+        """Formats gap-filling answers from the user for inclusion in a prompt."""
+        additional_info_text = ""
+        if additional_info:
+            additional_info_text = "\\n\\n**ADDITIONAL INFORMATION PROVIDED BY USER:**\\n"
+            additional_info_text += "The user has provided the following additional information to enhance their CV:\\n"
+            if additional_info.get('phone'):
+                additional_info_text += f"- Phone: {additional_info['phone']}\\n"
+            if additional_info.get('linkedin'):
+                additional_info_text += f"- LinkedIn: {additional_info['linkedin']}\\n"
+            if additional_info.get('location'):
+                additional_info_text += f"- Location: {additional_info['location']}\\n"
+            if additional_info.get('summary'):
+                additional_info_text += f"- Professional Summary: {additional_info['summary']}\\n"
+            if additional_info.get('skills'):
+                additional_info_text += f"- Additional Skills: {additional_info['skills']}\\n"
+            if additional_info.get('achievements'):
+                additional_info_text += f"- Key Achievements: {additional_info['achievements']}\\n"
+            additional_info_text += "\\nPlease incorporate this information naturally into the tailored CV."
+        return additional_info_text
+
+    def _build_tailor_prompt(self, cv_text, job_description, additional_info=None):
+        # Format additional information if provided
+        additional_info_text = self._format_additional_info(additional_info)
+        
+        parts = self.budget.fit(
+            {'cv': cv_text, 'job_description': job_description, 'additional_info': additional_info_text},
+            self.PROMPT_BUDGETS['tailor_cv']
+        )
+        cv_text = parts['cv']
+        job_description = parts['job_description']
+        additional_info_text = parts['additional_info']
+        
+        prompt = f"""
+        Act as an expert CV writer specializing in ATS (Applicant Tracking System) optimization. Tailor the following CV to match the Job Description provided.
+        
+        {self.TAILOR_RULES}
         CV Content:
         {cv_text}
         
@@ -302,128 +543,313 @@ class CVProcessor:
         {job_description}
         {additional_info_text}
         """
-        
+        return prompt
+
+    @staticmethod
+    def _tailor_error(e):
+        """Adds context to tailoring errors unless they are already user-facing."""
+        if "safety filters" in str(e) or "finish_reason" in str(e):
+            return e
+        return ValueError(f"Error generating tailored CV: {str(e)}")
+
+    @_retry_on_quota
+    def tailor_cv(self, cv_text, job_description, additional_info=None, bypass_cache=False):
+        """Rewrites the CV to match the job description with ATS optimization."""
+        prompt = self._build_tailor_prompt(cv_text, job_description, additional_info)
         try:
-            response = self.model.generate_content(prompt)
-            
-            # Check if response was blocked
-            if not response.parts:
-                # Check finish_reason
-                if hasattr(response, 'candidates') and response.candidates:
-                    finish_reason = response.candidates[0].finish_reason
-                    if finish_reason == 1:  # SAFETY
-                        raise ValueError(
-                            "The AI safety filters blocked the response. This can happen with very long CVs or job descriptions. "
-                            "Try shortening your CV or job description, or try again in a moment."
-                        )
-                    elif finish_reason == 3:  # RECITATION
-                        raise ValueError(
-                            "The response was blocked due to potential copyright issues. "
-                            "Please ensure your CV and job description don't contain copyrighted material."
-                        )
-                    else:
-                        raise ValueError(
-                            f"The AI model couldn't generate a response (finish_reason: {finish_reason}). "
-                            "Please try again or contact support."
-                        )
-                else:
-                    raise ValueError(
-                        "The AI model returned an empty response. This might be due to safety filters or API issues. "
-                        "Please try again in a moment."
-                    )
-            
-            return response.text
+            return self._generate(prompt, bypass_cache=bypass_cache, check_blocked=True)
         except Exception as e:
             # Re-raise with more context if it's not already our custom error
-            if "safety filters" in str(e) or "finish_reason" in str(e):
+            error = self._tailor_error(e)
+            if error is e:
                 raise
-            else:
-                raise ValueError(f"Error generating tailored CV: {str(e)}")
+            raise error
     
-    @retry(
-        retry=retry_if_exception_type(google.api_core.exceptions.ResourceExhausted),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    def improve_cv_for_ats(self, cv_text, validation_report):
+    # Which CV part each ATS recommendation (from validate_ats_compatibility) is about.
+    # 'local' issues are fixed without the model; 'long_lines'/'tables' target the sections containing them.
+    ATS_RECOMMENDATION_TARGETS = [
+        ("Missing 'Professional Summary'", 'summary'),
+        ("Missing 'Skills'", 'skills'),
+        ("Missing 'Work Experience'", 'experience'),
+        ("Missing 'Education'", 'education'),
+        ("No email address", 'header'),
+        ("No phone number", 'header'),
+        ("No LinkedIn", 'header'),
+        ("quantifiable achievements", 'experience'),
+        ("action verbs", 'experience'),
+        ("keywords from job description", 'summary'),
+        ("keywords from job description", 'skills'),
+        ("keyword match", 'summary'),
+        ("keyword match", 'skills'),
+        ("too long (keep under 2 pages)", 'experience'),
+        ("No bullet points", 'experience'),
+        ("Some lines are too long", 'long_lines'),
+        ("table formatting", 'tables'),
+        ("Inconsistent indentation", 'local'),
+        ("Title Case", 'local'),
+        ("Special characters", 'local'),
+    ]
+
+    # Heading keywords identifying each standard section, and the heading used when creating it
+    ATS_SECTION_KINDS = {
+        'summary': (('summary', 'profile'), 'Professional Summary'),
+        'skills': (('skill', 'competenc'), 'Core Competencies'),
+        'experience': (('experience', 'employment'), 'Work Experience'),
+        'education': (('education', 'academic'), 'Education'),
+    }
+
+    # Typographic characters the ATS check flags, with their plain-ASCII equivalents
+    ATS_ASCII_REPLACEMENTS = {
+        '\u2013': '-', '\u2014': '-', '\u2018': "'", '\u2019': "'", '\u201c': '"', '\u201d': '"',
+        '\u2022': '-', '\u2026': '...', '\u00a0': ' ',
+    }
+
+    @staticmethod
+    def _split_cv_sections(cv_text):
+        """Splits a Markdown CV into its header lines and a list of (heading, lines) sections."""
+        document = parse_cv(cv_text)
+        return list(document.header.lines), [[section.heading, list(section.lines)] for section in document.sections]
+
+    @staticmethod
+    def _join_cv_sections(header, sections):
+        lines = list(header)
+        for heading, body in sections:
+            lines.append(heading)
+            lines.extend(body)
+        return '\n'.join(lines)
+
+    def _section_kind(self, heading):
+        text = heading.strip()[3:].lower()
+        for kind, (keywords, _) in self.ATS_SECTION_KINDS.items():
+            if any(k in text for k in keywords):
+                return kind
+        return None
+
+    def _apply_local_ats_fixes(self, cv_text):
+        """Fixes header casing, bullet indentation and typographic characters without the model."""
+        for char, replacement in self.ATS_ASCII_REPLACEMENTS.items():
+            cv_text = cv_text.replace(char, replacement)
+        
+        lines = []
+        for line in cv_text.split('\n'):
+            if line.startswith('  -') or line.startswith('\t-'):
+                line = line.lstrip()
+            if line.startswith('## '):
+                heading = line[3:].strip()
+                if not (heading.istitle() or heading.isupper()):
+                    line = '## ' + self._capitalise_lowercase_words(heading)
+            lines.append(line)
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _capitalise_lowercase_words(heading):
+        """Capitalises the words written entirely in lower case; "AWS", "GCP" or "iOS" are left as they are."""
+        words = []
+        for word in heading.split(' '):
+            if word.islower():
+                first = next(i for i, c in enumerate(word) if c.islower())
+                word = word[:first] + word[first].upper() + word[first + 1:]
+            words.append(word)
+        return ' '.join(words)
+
+    def _plan_ats_improvement(self, cv_text, job_description=""):
         """
-        Improves a CV to achieve 90+ ATS score based on validation recommendations.
+        Applies local fixes, re-scores, and works out which parts of the CV still need the model.
+        The CV is re-scored after the fixes, so the caller's validation report isn't needed here.
+        Returns a dict with the fixed text, its split sections, and the targets to regenerate:
+        'header', indexes of existing sections, and kinds of missing sections to create.
         """
-        recommendations_text = "\n".join(validation_report.get('recommendations', []))
-        current_score = validation_report.get('score', 0)
+        fixed_text = self._apply_local_ats_fixes(cv_text)
+        report = self.validate_ats_compatibility(fixed_text, job_description)
+        header, sections = self._split_cv_sections(fixed_text)
+        
+        kinds = {}
+        for index, (heading, _) in enumerate(sections):
+            kinds.setdefault(self._section_kind(heading), index)
+        
+        rewrite_header = False
+        rewrite_indexes = set()
+        create_kinds = []
+        for recommendation in report['recommendations']:
+            for needle, target in self.ATS_RECOMMENDATION_TARGETS:
+                if needle not in recommendation or target == 'local':
+                    continue
+                if target == 'header':
+                    rewrite_header = True
+                elif target == 'long_lines':
+                    rewrite_indexes.update(
+                        i for i, (_, body) in enumerate(sections)
+                        if any(len(l) > 120 and not l.startswith('http') for l in body)
+                    )
+                elif target == 'tables':
+                    rewrite_indexes.update(i for i, (_, body) in enumerate(sections) if '|' in '\n'.join(body))
+                elif target in kinds:
+                    rewrite_indexes.add(kinds[target])
+                elif target not in create_kinds:
+                    create_kinds.append(target)
+        
+        return {
+            'text': fixed_text,
+            'report': report,
+            'header': header,
+            'sections': sections,
+            'rewrite_header': rewrite_header,
+            'rewrite_indexes': sorted(rewrite_indexes),
+            'create_kinds': create_kinds,
+        }
+
+    def _build_improve_prompt(self, plan):
+        targets = []
+        if plan['rewrite_header']:
+            targets.append(("HEADER", '\n'.join(plan['header']).strip()))
+        for index in plan['rewrite_indexes']:
+            heading, body = plan['sections'][index]
+            targets.append((f"SECTION {index}", '\n'.join([heading] + body).strip()))
+        for kind in plan['create_kinds']:
+            targets.append((f"NEW {kind.upper()}", f"(missing - create a '## {self.ATS_SECTION_KINDS[kind][1]}' section)"))
+        
+        target_keys = {key for key, _ in targets}
+        context_parts = []
+        if "HEADER" not in target_keys:
+            context_parts.append('\n'.join(plan['header']).strip())
+        for index, (heading, body) in enumerate(plan['sections']):
+            if f"SECTION {index}" not in target_keys:
+                context_parts.append('\n'.join([heading] + body).strip())
+        
+        # The parts being rewritten are never trimmed: each one replaces its section wholesale,
+        # so anything cut from the prompt would be lost. If they run over their budget, the
+        # reference context gives up the difference (the whole prompt is still checked on send).
+        sections = "\n\n".join(f"=== {key} ===\n{text}" for key, text in targets)
+        limits = dict(self.PROMPT_BUDGETS['improve_cv_for_ats'])
+        overflow = max(0, self.budget.count(sections) - limits.pop('sections'))
+        limits['context'] = max(0, limits['context'] - overflow)
+        parts = self.budget.fit(
+            {
+                'sections': sections,
+                'context': "\n\n".join(p for p in context_parts if p),
+                'recommendations': "\n".join(plan['report']['recommendations']),
+            },
+            limits
+        )
         
         prompt = f"""
-        Act as an expert ATS optimization specialist. You have a CV that scored {current_score}/100 on ATS compatibility.
-        Your goal is to improve this CV to achieve a score of 90+ (Grade A or B) while preserving all factual information.
+        Act as an expert ATS optimization specialist. A CV scored {plan['report']['score']}/100 on ATS compatibility.
+        Your goal is to fix the issues below so it reaches 90+ (Grade A or B) while preserving all factual information.
+        Only the parts listed under PARTS TO REWRITE need changes; every other part of the CV stays exactly as it is.
         
         **CURRENT ISSUES TO FIX:**
-        {recommendations_text}
-        
-        **CRITICAL ATS OPTIMIZATION REQUIREMENTS:**
-        1. **Contact Information (MUST HAVE):**
-           - Add standard phone format if missing: (XXX) XXX-XXXX
-           - Add full LinkedIn URL if missing: https://linkedin.com/in/username
-           - Add location in format: City, State (e.g., "New York, NY")
-        
-        2. **Section Headers (MUST USE EXACT NAMES):**
-           - ## Professional Summary (or ## Summary)
-           - ## Core Competencies (or ## Skills)
-           - ## Professional Experience (or ## Work Experience)
-           - ## Education
-           - ## Certifications (if applicable)
+        {parts['recommendations']}
+        
+        **RULES:**
+        - Header: standard phone format (XXX) XXX-XXXX, full LinkedIn URL (https://linkedin.com/in/username), location as "City, State"; use a placeholder only if the information is missing.
+        - Section headers use exact names in Title Case: ## Professional Summary, ## Core Competencies, ## Work Experience, ## Education, ## Certifications.
+        - Professional Summary: 3-4 lines with key qualifications, years of experience and core expertise.
+        - Skills: grouped by category (**Technical Skills:**, **Professional Skills:**), comma-separated, industry-standard terms.
+        - Work Experience: ### for job titles/companies, - bullets with no indentation, every bullet starts with a strong action verb (Led, Developed, Implemented, Achieved, Managed, Created, Designed, Improved, Increased, Reduced) and includes metrics where possible.
+        - Keep lines under 120 characters. No tables.
+        - Use the REST OF THE CV only as factual reference; never invent employers, titles, dates or degrees.
+        
+        **OUTPUT FORMAT (STRICT):**
+        For each part under PARTS TO REWRITE, output its marker line exactly as given (e.g. "=== SECTION 2 ==="),
+        followed by the rewritten Markdown for that part only. Sections start with their "## " header; the HEADER part
+        is the name line ("# Name") followed by contact lines. Output nothing else.
+        
+        **PARTS TO REWRITE:**
+        {parts['sections']}
+        
+        **REST OF THE CV (reference only, do not output):**
+        {parts['context']}
+        """
+        return prompt
+
+    def _apply_ats_improvement(self, plan, response_text, job_description=""):
+        """
+        Splices the regenerated parts into the locally fixed CV. Untouched sections are kept
+        verbatim, and the result is only used if it re-scores at least as well locally.
+        """
+        import re
         
-        3. **Professional Summary (MUST HAVE 3-4 LINES):**
-           - Strong opening statement
-           - Key qualifications and years of experience
-           - Core expertise areas
-           - Career objective or value proposition
-        
-        4. **Skills Section (CRITICAL):**
-           - Group skills by category:
-             * **Technical Skills:** List 5-10 relevant technical skills
-             * **Professional Skills:** List 3-5 soft skills
-           - Use comma-separated format
-           - Include industry-standard terminology
-        
-        5. **Quantifiable Achievements (ADD NUMBERS):**
-           - Every work experience bullet should have metrics when possible
-           - Use percentages, dollar amounts, or quantities
-           - Format: "Action Verb + Task + Quantifiable Result"
-           - Examples: "Increased revenue by 25%", "Managed team of 10", "Reduced costs by $50K"
-        
-        6. **Formatting (STRICT RULES):**
-           - Use ## for main section headers
-           - Use ### for job titles/companies
-           - Use - for bullet points (no indentation)
-           - Use **bold** for job titles and company names
-           - Keep lines under 120 characters
-           - Use Title Case for all section headers
-        
-        7. **Action Verbs (START EVERY BULLET):**
-           Use strong action verbs: Led, Developed, Implemented, Achieved, Managed, Created, 
-           Designed, Improved, Increased, Reduced, Streamlined, Optimized, etc.
-        
-        **INSTRUCTIONS:**
-        - Fix ALL issues mentioned in the recommendations
-        - Ensure EVERY required section is present
-        - Add missing contact information (use placeholder if needed)
-        - Add quantifiable metrics to work experience
-        - Use standard ATS-friendly formatting
-        - Maintain all factual information from original CV
-        - Return ONLY the improved CV in Markdown format
-        
-        **ORIGINAL CV:**
-        {cv_text}
+        rewritten = {}
+        current_key = None
+        for line in response_text.replace("```markdown", "").replace("```", "").split('\n'):
+            marker = re.match(r'^\s*===\s*(.+?)\s*===\s*$', line)
+            if marker:
+                current_key = marker.group(1).upper()
+                rewritten[current_key] = []
+            elif current_key:
+                rewritten[current_key].append(line)
+        rewritten = {k: '\n'.join(v).strip('\n') for k, v in rewritten.items() if '\n'.join(v).strip()}
+        
+        header = plan['header']
+        if plan['rewrite_header'] and "HEADER" in rewritten:
+            header = rewritten["HEADER"].split('\n') + ['']
+        
+        sections = []
+        for index, (heading, body) in enumerate(plan['sections']):
+            new_text = rewritten.get(f"SECTION {index}")
+            if new_text is None:
+                sections.append((heading, body))
+                continue
+            new_lines = new_text.split('\n')
+            if not new_lines[0].startswith('## '):
+                new_lines.insert(0, heading)
+            sections.append((new_lines[0], new_lines[1:] + ['']))
+        
+        # Missing sections go where the standard layout expects them
+        order = list(self.ATS_SECTION_KINDS)
+        for kind in plan['create_kinds']:
+            new_text = rewritten.get(f"NEW {kind.upper()}")
+            if new_text is None:
+                continue
+            new_lines = new_text.split('\n')
+            if not new_lines[0].startswith('## '):
+                new_lines.insert(0, f"## {self.ATS_SECTION_KINDS[kind][1]}")
+            position = len(sections)
+            for i, (heading, _) in enumerate(sections):
+                existing = self._section_kind(heading)
+                if existing in order and order.index(existing) > order.index(kind):
+                    position = i
+                    break
+            sections.insert(position, (new_lines[0], new_lines[1:] + ['']))
+        
+        improved = self._join_cv_sections(header, sections).strip() + '\n'
+        new_report = self.validate_ats_compatibility(improved, job_description)
+        if new_report['score'] < plan['report']['score']:
+            print(f"ATS improvement scored lower ({new_report['score']} < {plan['report']['score']}); keeping local fixes only.")
+            return plan['text']
+        return improved
+
+    def tailor_cv_stream(self, cv_text, job_description, additional_info=None, bypass_cache=False):
+        """Streaming version of tailor_cv; yields the tailored CV in chunks."""
+        prompt = self._build_tailor_prompt(cv_text, job_description, additional_info)
+        try:
+            yield from self._generate_stream(prompt, bypass_cache=bypass_cache)
+        except Exception as e:
+            error = self._tailor_error(e)
+            if error is e:
+                raise
+            raise error
+    
+    @_retry_on_quota
+    def improve_cv_for_ats(self, cv_text, validation_report, bypass_cache=False, job_description=""):
+        """
+        Improves a CV to achieve 90+ ATS score based on validation recommendations.
+        Formatting issues are fixed locally; only the sections that still fail are sent to
+        the model and spliced back, so untouched sections can't be silently altered.
+        `validation_report` is kept for callers; the plan re-scores the CV once it's been fixed locally.
         """
+        plan = self._plan_ats_improvement(cv_text, job_description)
+        if not (plan['rewrite_header'] or plan['rewrite_indexes'] or plan['create_kinds']):
+            return plan['text']
         
-        response = self.model.generate_content(prompt)
-        return response.text
+        response_text = self._generate(self._build_improve_prompt(plan), bypass_cache=bypass_cache)
+        return self._apply_ats_improvement(plan, response_text, job_description)
 
     def validate_cv(self, cv_text: str) -> str:
         """Simple validation of the generated CV.
         Checks for presence of key sections and returns a report.
         """
-        import re
+        signals = scan_cv(cv_text)
         required_sections = [
             # "Header", # Header is usually implicit at the top
             "Professional Summary",
@@ -431,11 +857,7 @@ class CVProcessor:
             "Work Experience",
             "Education",
         ]
-        missing = []
-        for sec in required_sections:
-            pattern = rf"##\s*{re.escape(sec)}"
-            if not re.search(pattern, cv_text, re.IGNORECASE):
-                missing.append(sec)
+        missing = [sec for sec in required_sections if not signals.has_section(sec)]
         if missing:
             return "Missing sections: " + ", ".join(missing)
         return "CV looks good – all required sections are present."
@@ -445,62 +867,51 @@ class CVProcessor:
         Validates CV for ATS compatibility and returns a detailed report.
         Returns a dict with 'score', 'passed', and 'recommendations'.
         """
-        import re
+        signals = scan_cv(cv_text)
         
         score = 0
         max_score = 100
         recommendations = []
         
         # 1. Check for required sections (20 points)
-        required_sections = ["Professional Summary", "Summary", "Skills", "Core Competencies", 
-                           "Work Experience", "Professional Experience", "Education"]
-        found_sections = []
-        for sec in required_sections:
-            if re.search(rf"##\s*{re.escape(sec)}", cv_text, re.IGNORECASE):
-                found_sections.append(sec)
-        
-        if any(s in found_sections for s in ["Professional Summary", "Summary"]):
+        if signals.has_section("Professional Summary", "Summary"):
             score += 5
         else:
             recommendations.append("❌ Missing 'Professional Summary' section")
         
-        if any(s in found_sections for s in ["Skills", "Core Competencies"]):
+        if signals.has_section("Skills", "Core Competencies"):
             score += 5
         else:
             recommendations.append("❌ Missing 'Skills' or 'Core Competencies' section")
         
-        if any(s in found_sections for s in ["Work Experience", "Professional Experience"]):
+        if signals.has_section("Work Experience", "Professional Experience"):
             score += 5
         else:
             recommendations.append("❌ Missing 'Work Experience' section")
         
-        if "Education" in found_sections:
+        if signals.has_section("Education"):
             score += 5
         else:
             recommendations.append("❌ Missing 'Education' section")
         
         # 2. Check contact information format (20 points)
-        has_email = bool(re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', cv_text))
-        has_phone = bool(re.search(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', cv_text))
-        has_linkedin = bool(re.search(r'linkedin\.com/in/[\w-]+', cv_text, re.IGNORECASE))
-        
-        if has_email:
+        if signals.has_email:
             score += 7
         else:
             recommendations.append("❌ No email address found")
         
-        if has_phone:
+        if signals.has_phone:
             score += 7
         else:
             recommendations.append("⚠️ No phone number found or incorrect format")
         
-        if has_linkedin:
+        if signals.has_linkedin:
             score += 6
         else:
             recommendations.append("⚠️ No LinkedIn profile found")
         
         # 3. Check for quantifiable achievements (15 points)
-        numbers_count = len(re.findall(r'\d+%|\$\d+|\d+\+', cv_text))
+        numbers_count = signals.metric_count
         if numbers_count >= 5:
             score += 15
         elif numbers_count >= 3:
@@ -511,9 +922,7 @@ class CVProcessor:
             recommendations.append("❌ Very few quantifiable achievements found")
         
         # 4. Check for action verbs (10 points)
-        action_verbs = ['Led', 'Developed', 'Managed', 'Implemented', 'Achieved', 'Increased', 
-                       'Reduced', 'Created', 'Designed', 'Improved']
-        verb_count = sum(1 for verb in action_verbs if verb in cv_text)
+        verb_count = len(signals.action_verbs)
         if verb_count >= 5:
             score += 10
         elif verb_count >= 3:
@@ -523,87 +932,66 @@ class CVProcessor:
             recommendations.append("⚠️ Use more action verbs (Led, Developed, Managed, etc.)")
         
         # 5. Check for keyword matching if job description provided (20 points)
+        keyword_report = None
         if job_description:
-            # Extract potential keywords (simple approach)
-            job_keywords = set(re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', job_description))
-            job_keywords.update(re.findall(r'\b[A-Z]{2,}\b', job_description))  # Acronyms
+            # Keyword automaton for this JD (built once, cached by JD hash) matched in one pass over the CV
+            keyword_report = get_keyword_matcher(job_description).match(cv_text)
+            match_rate = keyword_report['match_rate']
             
-            matched_keywords = [kw for kw in job_keywords if kw in cv_text]
-            match_rate = len(matched_keywords) / max(len(job_keywords), 1)
-            
-            if match_rate >= 0.5:
-                score += 20
-            elif match_rate >= 0.3:
-                score += 15
-                recommendations.append("⚠️ Include more keywords from job description")
-            else:
-                score += 5
-                recommendations.append("❌ Low keyword match with job description")
+            for min_rate, points, recommendation in KEYWORD_SCORE_BANDS:
+                if match_rate >= min_rate:
+                    score += points
+                    if recommendation:
+                        recommendations.append(recommendation)
+                    break
         else:
-            score += 10  # Give partial credit if no job description provided
+            score += NO_JOB_DESCRIPTION_POINTS  # Give partial credit if no job description provided
         
         # 6. Check file size (text length as proxy) (5 points)
-        if len(cv_text) < 10000:  # Reasonable CV length
+        if signals.length < 10000:  # Reasonable CV length
             score += 5
         else:
             recommendations.append("⚠️ CV might be too long (keep under 2 pages)")
         
         # 7. Check for problematic formatting (10 points)
-        if '|' not in cv_text or cv_text.count('|') < 10:  # Likely no tables
+        if signals.pipe_count < 10:  # Likely no tables
             score += 5
         else:
             recommendations.append("⚠️ Possible table formatting detected (not ATS-friendly)")
         
-        if not re.search(r'[^\x00-\x7F]', cv_text):  # No special characters
+        if not signals.has_non_ascii:  # No special characters
             score += 5
         else:
             recommendations.append("⚠️ Special characters detected (may cause ATS issues)")
         
         # 8. Check for proper markdown formatting (10 points)
         # Check for section headers (##)
-        section_headers = re.findall(r'^##\s+.+$', cv_text, re.MULTILINE)
-        if len(section_headers) >= 4:  # At least 4 main sections
+        if len(signals.section_headers) >= 4:  # At least 4 main sections
             score += 5
         else:
             recommendations.append("❌ Missing proper section headers (use ## for sections)")
         
         # Check for consistent bullet points
-        bullet_lines = re.findall(r'^\s*-\s+.+$', cv_text, re.MULTILINE)
-        if bullet_lines:
+        if signals.has_bullets:
             score += 5
         else:
             recommendations.append("⚠️ No bullet points found (use - for lists)")
         
         # 9. Check for indentation and formatting consistency (5 points)
-        lines = cv_text.split('\n')
-        inconsistent_indent = False
-        for line in lines:
-            if line.startswith('  -') or line.startswith('\t-'):  # Improper indentation
-                inconsistent_indent = True
-                break
-        
-        if not inconsistent_indent:
+        if not signals.indented_bullets:  # "  -" / tab-indented bullets
             score += 5
         else:
             recommendations.append("⚠️ Inconsistent indentation detected")
         
         # 10. Check for proper capitalization in headers (5 points)
-        proper_caps = True
-        for header in section_headers:
-            # Remove ## and check if title case or all caps
-            header_text = header.replace('##', '').strip()
-            if not (header_text.istitle() or header_text.isupper()):
-                proper_caps = False
-                break
-        
-        if proper_caps and section_headers:
+        # Title case or all caps
+        if signals.headers_title_case and signals.section_headers:
             score += 5
         else:
             recommendations.append("⚠️ Section headers should use Title Case")
         
         # 11. Check for reasonable line lengths (5 points)
-        long_lines = [line for line in lines if len(line) > 120 and not line.startswith('http')]
-        if len(long_lines) < 3:
+        if signals.long_line_count < 3:
             score += 5
         else:
             recommendations.append("⚠️ Some lines are too long (keep under 120 characters)")
@@ -618,17 +1006,48 @@ class CVProcessor:
             "passed": passed,
             "recommendations": recommendations
         }
+        if keyword_report is not None:
+            report["keywords"] = {
+                "matched": sorted(keyword_report['matched']),
+                "missing": list(keyword_report['missing']),
+            }
         
         return report
 
-    @retry(
-        retry=retry_if_exception_type(google.api_core.exceptions.ResourceExhausted),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    def generate_interview_questions(self, cv_text, job_description):
-        """Generates interview questions based on CV and Job Description."""
-        prompt = f"""
+    def score_ats_batch(self, cv_texts, job_descriptions):
+        """
+        Scores many CVs against many job descriptions in one vectorized pass.
+        Returns an ATSBatchScores with a (n_cvs, n_jobs) score matrix; per-pair reports are built on demand.
+        """
+        from ats_batch import score_ats_batch
+        return score_ats_batch(self, cv_texts, job_descriptions)
+
+    def score_job_fit(self, cv_text, job_description, update=True):
+        """
+        Local BM25 / TF-IDF fit of a CV for a job, with no model calls, so jobs can be triaged before tailoring.
+        Returns a dict with 'fit_score' (0-100), the component scores, 'top_terms' and 'missing_terms'.
+        update=False scores without adding the description to the corpus (e.g. text still being edited).
+        """
+        from relevance import get_relevance_engine
+        return get_relevance_engine().score(cv_text, job_description, update=update)
+
+    def add_job_description(self, job_description):
+        """Counts a fetched job description in the job-fit corpus statistics (once per distinct text)."""
+        from relevance import get_relevance_engine
+        return get_relevance_engine().add_documents([job_description])
+
+    def relevance_stats(self):
+        from relevance import get_relevance_engine
+        return get_relevance_engine().stats()
+
+    def _build_interview_prompt(self, cv_text, job_description):
+        parts = self.budget.fit(
+            {'cv': cv_text, 'job_description': job_description},
+            self.PROMPT_BUDGETS['interview_questions']
+        )
+        cv_text = parts['cv']
+        job_description = parts['job_description']
+        return f"""
         Act as a strict technical hiring manager. Based on the candidate's CV and the Job Description, generate a list of 10 likely interview questions.
         
         **requirements:**
@@ -641,22 +1060,26 @@ class CVProcessor:
         Markdown list. For each question, provide a quick "Tip" on what a good answer should include.
         
         Job Description:
-        {job_description[:2000]}
+        {job_description}
         
         CV Content:
         {cv_text}
         """
-        response = self.model.generate_content(prompt)
-        return response.text
 
-    @retry(
-        retry=retry_if_exception_type(google.api_core.exceptions.ResourceExhausted),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    def generate_outreach_messages(self, cv_text, job_description):
-        """Generates LinkedIn connection note and Cold Email."""
-        prompt = f"""
+    @_retry_on_quota
+    def generate_interview_questions(self, cv_text, job_description, bypass_cache=False):
+        """Generates interview questions based on CV and Job Description."""
+        prompt = self._build_interview_prompt(cv_text, job_description)
+        return self._generate(prompt, bypass_cache=bypass_cache)
+
+    def _build_outreach_prompt(self, cv_text, job_description):
+        parts = self.budget.fit(
+            {'cv': cv_text, 'job_description': job_description},
+            self.PROMPT_BUDGETS['outreach_messages']
+        )
+        cv_text = parts['cv']
+        job_description = parts['job_description']
+        return f"""
         Act as a career networking expert. Write two outreach messages for the candidate to send to a hiring manager or recruiter for this job.
         
         **1. LinkedIn Connection Request (Strictly under 300 characters):**
@@ -669,167 +1092,43 @@ class CVProcessor:
         - Call to Action: Ask for a brief chat.
         
         Job Description:
-        {job_description[:1500]}
+        {job_description}
         
         CV Content (Extract name/skills):
         {cv_text}
         """
-        response = self.model.generate_content(prompt)
-        return response.text
+
+    @_retry_on_quota
+    def generate_outreach_messages(self, cv_text, job_description, bypass_cache=False):
+        """Generates LinkedIn connection note and Cold Email."""
+        prompt = self._build_outreach_prompt(cv_text, job_description)
+        return self._generate(prompt, bypass_cache=bypass_cache)
 
     def generate_docx(self, cv_text, filename):
         """Converts Markdown CV text to a professionally formatted DOCX file."""
-        from docx import Document
-        from docx.shared import Pt, Inches, RGBColor
-        from docx.enum.text import WD_ALIGN_PARAGRAPH
-        import re
+        with open(filename, 'wb') as f:
+            f.write(self.render_docx(cv_text))
+        return filename
 
-        doc = Document()
-        
-        # --- Styles ---
-        style = doc.styles['Normal']
-        font = style.font
-        font.name = 'Calibri'
-        font.size = Pt(11)
-
-        # Helper to add styled paragraph
-        def add_styled_para(text, bold=False, italic=False, size=None, align=None, space_after=None):
-            p = doc.add_paragraph()
-            run = p.add_run(text)
-            run.bold = bold
-            run.italic = italic
-            if size:
-                run.font.size = Pt(size)
-            if align:
-                p.alignment = align
-            if space_after is not None:
-                p.paragraph_format.space_after = Pt(space_after)
-            return p
-
-        # --- Parsing ---
-        # Clean up markdown code blocks if present
-        cv_text = cv_text.replace("```markdown", "").replace("```", "").strip()
-        
-        lines = cv_text.split('\n')
-        
-        # 1. Extract Header (Name & Contact)
-        # Assumption: The first H1 is the Name, followed by contact lines until the next Header.
-        header_lines = []
-        body_lines = []
-        
-        is_header = True
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # If we hit a section header (##), header is done
-            if line.startswith('## '):
-                is_header = False
-            
-            if is_header:
-                # Remove markdown headers for the name
-                clean_line = line.replace('# ', '').replace('**', '').strip()
-                header_lines.append(clean_line)
-            else:
-                body_lines.append(line)
-
-        # 2. Write Header
-        if header_lines:
-            # Name (First line)
-            name = header_lines[0]
-            add_styled_para(name, bold=True, size=24, align=WD_ALIGN_PARAGRAPH.CENTER, space_after=6)
-            
-            # Contact Info (Joined by |)
-            contact_info = " | ".join(header_lines[1:])
-            add_styled_para(contact_info, size=10, align=WD_ALIGN_PARAGRAPH.CENTER, space_after=18)
-            
-            # Horizontal Line
-            p = doc.add_paragraph()
-            p.paragraph_format.border_bottom_color = RGBColor(0, 0, 0)
-            p.paragraph_format.border_bottom_width = Pt(1)
-            p.paragraph_format.space_after = Pt(12)
-
-        # 3. Write Body Sections
-        current_section = ""
-        skills_buffer = []
-        
-        def flush_skills():
-            nonlocal skills_buffer
-            if skills_buffer:
-                # Join with a bullet point separator
-                skill_text = " • ".join(skills_buffer)
-                p = doc.add_paragraph(skill_text)
-                p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-                p.paragraph_format.space_after = Pt(12)
-                skills_buffer = []
-
-        for line in body_lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Check if we are hitting a header or new section, flush skills if needed
-            if line.startswith('## ') or line.startswith('### '):
-                flush_skills()
+    def render_docx(self, cv_text):
+        """
+        Returns the formatted DOCX for a Markdown CV as bytes.
+        Built from the shared pre-styled template and cached by the CV's content hash.
+        """
+        from docx_utils import render_markdown_docx
+        return render_markdown_docx(cv_text, 'cv')
 
-            # Section Headers (##)
-            if line.startswith('## '):
-                current_section = line[3:].strip()
-                p = doc.add_heading(current_section.upper(), level=1)
-                p.paragraph_format.space_before = Pt(12)
-                p.paragraph_format.space_after = Pt(6)
-                continue
-                
-            # Sub-headers (###)
-            if line.startswith('### '):
-                text = line[4:].strip().replace('**', '')
-                p = doc.add_heading(text, level=2)
-                p.paragraph_format.space_before = Pt(6)
-                p.paragraph_format.space_after = Pt(3)
-                continue
-                
-            # Bullet Points
-            if line.startswith('- ') or line.startswith('* '):
-                text = line[2:].strip().replace('**', '') # Simple bold removal for cleanliness
-                
-                # Special formatting for Skills section
-                if "SKILLS" in current_section.upper():
-                    skills_buffer.append(text)
-                else:
-                    # Normal bullet point
-                    p = doc.add_paragraph(text, style='List Bullet')
-            
-            # Normal Text
-            else:
-                # If we encounter normal text in skills section, flush buffer first
-                if "SKILLS" in current_section.upper() and skills_buffer:
-                    flush_skills()
-
-                # Handle bolding within text **like this**
-                p = doc.add_paragraph()
-                parts = re.split(r'(\*\*.*?\*\*)', line)
-                for part in parts:
-                    if part.startswith('**') and part.endswith('**'):
-                        run = p.add_run(part[2:-2])
-                        run.bold = True
-                    else:
-                        p.add_run(part)
-        
-        # Final flush
-        flush_skills()
-
-        doc.save(filename)
-        return filename
+    def docx_etag(self, cv_text):
+        """ETag of render_docx(cv_text), computed from the text alone."""
+        from docx_renderer import DocxRenderer
+        return DocxRenderer.etag('cv', cv_text)
 
+    def docx_stats(self):
+        from docx_renderer import get_docx_renderer
+        return get_docx_renderer().stats()
 
-    @retry(
-        retry=retry_if_exception_type(google.api_core.exceptions.ResourceExhausted),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    def generate_cover_letter(self, cv_text, job_info):
-        """Generates a cover letter using job info (title, company, description)."""
+
+    def _build_cover_letter_prompt(self, cv_text, job_info):
         # Support both dict and plain description string
         if isinstance(job_info, dict):
             title = job_info.get('title', '')
@@ -841,10 +1140,14 @@ class CVProcessor:
             company = ''
             description = job_info
             summary = ''
-        # Truncate description to avoid overly long prompts
-        max_len = 1500
-        if len(description) > max_len:
-            description = description[:max_len] + "..."
+        # Keep the most relevant parts of long descriptions within budget
+        parts = self.budget.fit(
+            {'cv': cv_text, 'job_description': description, 'summary': summary},
+            self.PROMPT_BUDGETS['cover_letter']
+        )
+        cv_text = parts['cv']
+        description = parts['job_description']
+        summary = parts['summary']
         # Build a detailed prompt, optionally including a summary
         prompt = f"""
         You are a professional cover letter writer.
@@ -860,5 +1163,247 @@ class CVProcessor:
         Job Description:
         {description}
         """
-        response = self.model.generate_content(prompt)
-        return response.text
+        return prompt
+
+    @_retry_on_quota
+    def generate_cover_letter(self, cv_text, job_info, bypass_cache=False):
+        """Generates a cover letter using job info (title, company, description)."""
+        prompt = self._build_cover_letter_prompt(cv_text, job_info)
+        return self._generate(prompt, bypass_cache=bypass_cache)
+
+    def generate_cover_letter_stream(self, cv_text, job_info, bypass_cache=False):
+        """Streaming version of generate_cover_letter; yields the letter in chunks."""
+        prompt = self._build_cover_letter_prompt(cv_text, job_info)
+        yield from self._generate_stream(prompt, bypass_cache=bypass_cache)
+
+    # Artifacts returned by generate_application_bundle, all Markdown strings
+    BUNDLE_FIELDS = ('tailored_cv', 'cover_letter', 'interview_questions', 'outreach_messages')
+
+    def _build_bundle_prompt(self, cv_text, job_info, additional_info=None):
+        if isinstance(job_info, dict):
+            title = job_info.get('title', '')
+            company = job_info.get('company', '')
+            description = job_info.get('description', '')
+            summary = job_info.get('summary', '')
+        else:
+            title = ''
+            company = ''
+            description = job_info
+            summary = ''
+        
+        parts = self.budget.fit(
+            {'cv': cv_text, 'job_description': description, 'summary': summary,
+             'additional_info': self._format_additional_info(additional_info)},
+            self.PROMPT_BUDGETS['application_bundle']
+        )
+        
+        prompt = f"""
+        Act as an expert career coach and CV writer specializing in ATS (Applicant Tracking System) optimization.
+        Using the candidate's CV and the Job Description, produce a complete job application for the position \"{title}\" at \"{company}\" in ONE response.
+        
+        **OUTPUT FORMAT (STRICT):**
+        Return a single JSON object with exactly these string fields:
+        - "tailored_cv": the CV tailored to the Job Description, in clean Markdown, following the CV RULES below.
+        - "cover_letter": a concise, targeted cover letter aligned with the job description.
+        - "interview_questions": a Markdown list of 10 likely interview questions (3 technical, 3 behavioral (STAR method), 2 "curveball" or cultural fit, 2 about specific projects/experiences in the CV). For each question add a quick "Tip" on what a good answer should include.
+        - "outreach_messages": in Markdown, (1) a LinkedIn connection request strictly under 300 characters that mentions the role, and (2) a concise cold email with a professional subject line, the candidate's top 2 strengths for this job and a call to action asking for a brief chat.
+        Do not add any other fields or any text outside the JSON object.
+        Where the CV RULES say to return only the CV in Markdown, that applies to the "tailored_cv" field.
+        
+        **CV RULES:**
+        {self.TAILOR_RULES}
+        """
+        if parts['summary']:
+            prompt += f"\nAdditional summary of the role (highlights, required skills, responsibilities):\n{parts['summary']}\n"
+        prompt += f"""
+        CV Content:
+        {parts['cv']}
+        
+        Job Description:
+        {parts['job_description']}
+        {parts['additional_info']}
+        """
+        return prompt
+
+    def _parse_bundle(self, text):
+        """Parses and validates the bundle JSON. Raises ValueError if the schema doesn't match."""
+        import json
+        
+        # Tolerate a fenced code block around the JSON
+        cleaned = text.strip()
+        if cleaned.startswith("```"):
+            cleaned = cleaned.strip("`")
+            if cleaned.startswith("json"):
+                cleaned = cleaned[4:]
+        data = json.loads(cleaned)
+        if not isinstance(data, dict):
+            raise ValueError("Application bundle is not a JSON object")
+        
+        bundle = {}
+        for field in self.BUNDLE_FIELDS:
+            value = data.get(field)
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f"Application bundle is missing '{field}'")
+            bundle[field] = value.strip()
+        return bundle
+
+    @_retry_on_quota
+    def _generate_bundle(self, prompt, bypass_cache=False):
+        # Only the bundle call is retried here: the fallback calls carry their own retries,
+        # and retrying around them too would multiply the attempts on a 429
+        text = self._generate(
+            prompt, bypass_cache=bypass_cache, check_blocked=True,
+            generation_config={"response_mime_type": "application/json"},
+            validate=self._parse_bundle
+        )
+        return self._parse_bundle(text)
+
+    def generate_application_bundle(self, cv_text, job_info, additional_info=None, bypass_cache=False):
+        """
+        Generates the tailored CV, cover letter, interview questions and outreach messages
+        in a single structured (JSON) call. Falls back to the individual calls if the
+        response can't be parsed. Returns a dict with BUNDLE_FIELDS plus 'source'.
+        """
+        prompt = self._build_bundle_prompt(cv_text, job_info, additional_info)
+        try:
+            bundle = self._generate_bundle(prompt, bypass_cache=bypass_cache)
+            bundle['source'] = 'bundle'
+            return bundle
+        except Exception as e:
+            if isinstance(e, _quota_error()):
+                raise
+            print(f"Application bundle failed, falling back to individual calls: {e}")
+        
+        description = job_info.get('description', '') if isinstance(job_info, dict) else job_info
+        return {
+            'tailored_cv': self.tailor_cv(cv_text, description, additional_info, bypass_cache=bypass_cache),
+            'cover_letter': self.generate_cover_letter(cv_text, job_info, bypass_cache=bypass_cache),
+            'interview_questions': self.generate_interview_questions(cv_text, description, bypass_cache=bypass_cache),
+            'outreach_messages': self.generate_outreach_messages(cv_text, description, bypass_cache=bypass_cache),
+            'source': 'fallback',
+        }
+
+
+class AsyncCVProcessor(CVProcessor):
+    """
+    Async variant of CVProcessor built on the SDK's generate_content_async.
+    Prompt building, caching and local validation are shared with CVProcessor;
+    only the Gemini calls are awaited so they don't block the event loop.
+    """
+
+    async def _model_async(self):
+        """The model; on first use it's built in a thread, since importing and configuring the SDK is slow."""
+        if self._model is None:
+            await asyncio.to_thread(lambda: self.model)
+        return self._model
+
+    async def _generate_async(self, prompt, bypass_cache=False, check_blocked=False, generation_config=None, validate=None):
+        key = self.cache.make_key(self.model_name, prompt)
+        # The cache is SQLite with a busy timeout: a locked database mustn't stall the event loop
+        if not bypass_cache:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return cached
+        
+        async def call():
+            prompt_tokens = self.budget.check(prompt)
+            model = await self._model_async()
+            await self.scheduler.acquire_async(self.scheduler.estimate_tokens(prompt_tokens))
+            try:
+                response = await model.generate_content_async(prompt, generation_config=generation_config)
+            except Exception as e:
+                if isinstance(e, _quota_error()):
+                    self.scheduler.report_throttled()
+                raise
+            if check_blocked:
+                self._raise_if_blocked(response)
+            
+            text = response.text
+            if validate:
+                validate(text)
+            await asyncio.to_thread(self.cache.set, key, text, self.model_name)
+            return text
+        
+        return await self.flight.do_async(key, call)
+
+    @_retry_on_quota
+    async def assess_cv(self, cv_text, bypass_cache=False):
+        """Assess the CV against general best practices."""
+        prompt = self._build_assess_prompt(cv_text)
+        return await self._generate_async(prompt, bypass_cache=bypass_cache)
+
+    @_retry_on_quota
+    async def tailor_cv(self, cv_text, job_description, additional_info=None, bypass_cache=False):
+        """Rewrites the CV to match the job description with ATS optimization."""
+        prompt = self._build_tailor_prompt(cv_text, job_description, additional_info)
+        try:
+            return await self._generate_async(prompt, bypass_cache=bypass_cache, check_blocked=True)
+        except Exception as e:
+            error = self._tailor_error(e)
+            if error is e:
+                raise
+            raise error
+
+    @_retry_on_quota
+    async def improve_cv_for_ats(self, cv_text, validation_report, bypass_cache=False, job_description=""):
+        """Improves a CV to achieve 90+ ATS score, regenerating only the failing sections."""
+        plan = self._plan_ats_improvement(cv_text, job_description)
+        if not (plan['rewrite_header'] or plan['rewrite_indexes'] or plan['create_kinds']):
+            return plan['text']
+        
+        response_text = await self._generate_async(self._build_improve_prompt(plan), bypass_cache=bypass_cache)
+        return self._apply_ats_improvement(plan, response_text, job_description)
+
+    @_retry_on_quota
+    async def generate_interview_questions(self, cv_text, job_description, bypass_cache=False):
+        """Generates interview questions based on CV and Job Description."""
+        prompt = self._build_interview_prompt(cv_text, job_description)
+        return await self._generate_async(prompt, bypass_cache=bypass_cache)
+
+    @_retry_on_quota
+    async def generate_outreach_messages(self, cv_text, job_description, bypass_cache=False):
+        """Generates LinkedIn connection note and Cold Email."""
+        prompt = self._build_outreach_prompt(cv_text, job_description)
+        return await self._generate_async(prompt, bypass_cache=bypass_cache)
+
+    @_retry_on_quota
+    async def generate_cover_letter(self, cv_text, job_info, bypass_cache=False):
+        """Generates a cover letter using job info (title, company, description)."""
+        prompt = self._build_cover_letter_prompt(cv_text, job_info)
+        return await self._generate_async(prompt, bypass_cache=bypass_cache)
+
+    @_retry_on_quota
+    async def _generate_bundle(self, prompt, bypass_cache=False):
+        text = await self._generate_async(
+            prompt, bypass_cache=bypass_cache, check_blocked=True,
+            generation_config={"response_mime_type": "application/json"},
+            validate=self._parse_bundle
+        )
+        return self._parse_bundle(text)
+
+    async def generate_application_bundle(self, cv_text, job_info, additional_info=None, bypass_cache=False):
+        """Async version of CVProcessor.generate_application_bundle; the fallback calls run concurrently."""
+        prompt = self._build_bundle_prompt(cv_text, job_info, additional_info)
+        try:
+            bundle = await self._generate_bundle(prompt, bypass_cache=bypass_cache)
+            bundle['source'] = 'bundle'
+            return bundle
+        except Exception as e:
+            if isinstance(e, _quota_error()):
+                raise
+            print(f"Application bundle failed, falling back to individual calls: {e}")
+        
+        description = job_info.get('description', '') if isinstance(job_info, dict) else job_info
+        tailored_cv, cover_letter, questions, messages = await asyncio.gather(
+            self.tailor_cv(cv_text, description, additional_info, bypass_cache=bypass_cache),
+            self.generate_cover_letter(cv_text, job_info, bypass_cache=bypass_cache),
+            self.generate_interview_questions(cv_text, description, bypass_cache=bypass_cache),
+            self.generate_outreach_messages(cv_text, description, bypass_cache=bypass_cache),
+        )
+        return {
+            'tailored_cv': tailored_cv,
+            'cover_letter': cover_letter,
+            'interview_questions': questions,
+            'outreach_messages': messages,
+            'source': 'fallback',
+        }
@@ -0,0 +1,175 @@
+import re
+import functools
+from dataclasses import dataclass
+
+# Contact details and metrics can span line breaks in PDF-extracted text, so these run over the whole CV
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_PHONE_RE = re.compile(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
+_LINKEDIN_RE = re.compile(r'linkedin\.com/in/[\w-]+', re.IGNORECASE)
+_LOCATION_RE = re.compile(r'\b[A-Z][a-z]+,\s*[A-Z]{2}\b')
+_METRIC_RE = re.compile(r'\d+%|\$\d+|\d+\+')
+
+# "## <name>" anywhere in the text, as the section checks have always matched it
+_SECTION_RE = re.compile(
+    r'##\s*(professional\s+summary|summary|skills|core\s+competencies|technical\s+skills'
+    r'|work\s+experience|professional\s+experience|education)',
+    re.IGNORECASE
+)
+# Section names at the start of a line, with or without "##" (raw PDF text has no Markdown)
+_LINE_SECTION_RE = re.compile(
+    r'(?:^|\n)\s*(?:(?P<experience>work\s+experience|professional\s+experience|employment\s+history)'
+    r'|(?P<education>education|academic\s+background))',
+    re.IGNORECASE
+)
+# Same semantics as the original checks, including "\s" spanning a line break after a bare "##" / "-"
+_HEADER_RE = re.compile(r'^##\s+.+$', re.MULTILINE)
+_BULLET_RE = re.compile(r'^\s*-\s+.+$', re.MULTILINE)
+_SUMMARY_BODY_RE = re.compile(r'##\s*(Professional\s+)?Summary\s*\n(.+?)(?=\n##|\Z)', re.IGNORECASE | re.DOTALL)
+_WHITESPACE_RE = re.compile(r'\s+')
+# Words as keyword_matcher tokenizes them: "C++", "C#", "Node.js" and "CI/CD" stay one token,
+# hyphens split ("full-stack" == "full stack") and trailing punctuation is dropped.
+# JD keywords are cut from the same token stream, so a JD always matches itself.
+WORD_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9+#]*(?:[./][A-Za-z0-9+#]+)*")
+_PHRASE_GAP_RE = re.compile(r'[ \t]+')
+
+ACTION_VERBS = ('Led', 'Developed', 'Managed', 'Implemented', 'Achieved', 'Increased',
+                'Reduced', 'Created', 'Designed', 'Improved')
+
+
+@dataclass(frozen=True)
+class CVSignals:
+    """Everything the gap and ATS checks look at, extracted from a CV in one scan."""
+    has_email: bool
+    has_phone: bool
+    has_linkedin: bool
+    has_location: bool
+    # Lower-cased names of "## ..." sections as written, e.g. {"professional summary", "skills"}
+    sections: frozenset
+    has_experience_line: bool
+    has_education_line: bool
+    summary_text: str
+    metric_count: int
+    action_verbs: frozenset
+    section_headers: tuple
+    headers_title_case: bool
+    has_bullets: bool
+    indented_bullets: bool
+    long_line_count: int
+    pipe_count: int
+    has_non_ascii: bool
+    length: int
+
+    def has_section(self, *names, loose=False):
+        """True if any of `names` is a "## " section; loose=True also accepts extra whitespace between words."""
+        found = self.sections
+        if loose:
+            found = {_WHITESPACE_RE.sub(' ', name) for name in found}
+        return any(name.lower() in found for name in names)
+
+
+@functools.lru_cache(maxsize=64)
+def scan_cv(cv_text):
+    """
+    Scans a CV once and returns its CVSignals.
+    Cached by text, so Streamlit reruns that re-validate an unchanged CV cost nothing.
+    """
+    # Whole-text scans rather than cv_document's parse: the ATS score has always counted
+    # "##Education", "### Skills" and indented "  ## ..." lines this way
+    indented_bullets = False
+    long_line_count = 0
+    for line in cv_text.split('\n'):
+        if line.startswith('  -') or line.startswith('\t-'):
+            indented_bullets = True
+        if len(line) > 120 and not line.startswith('http'):
+            long_line_count += 1
+
+    section_headers = _HEADER_RE.findall(cv_text)
+    headers_title_case = True
+    for header in section_headers:
+        header_text = header.replace('##', '').strip()
+        if not (header_text.istitle() or header_text.isupper()):
+            headers_title_case = False
+            break
+
+    sections = frozenset(m.group(1).lower() for m in _SECTION_RE.finditer(cv_text))
+
+    has_experience_line = has_education_line = False
+    for match in _LINE_SECTION_RE.finditer(cv_text):
+        if match.group('education'):
+            has_education_line = True
+        else:
+            has_experience_line = True
+        if has_experience_line and has_education_line:
+            break
+
+    summary_text = ""
+    if any(_WHITESPACE_RE.sub(' ', name) in ('summary', 'professional summary') for name in sections):
+        summary_match = _SUMMARY_BODY_RE.search(cv_text)
+        if summary_match:
+            summary_text = summary_match.group(2).strip()
+
+    return CVSignals(
+        has_email=bool(_EMAIL_RE.search(cv_text)),
+        has_phone=bool(_PHONE_RE.search(cv_text)),
+        has_linkedin=bool(_LINKEDIN_RE.search(cv_text)),
+        has_location=bool(_LOCATION_RE.search(cv_text)),
+        sections=sections,
+        has_experience_line=has_experience_line,
+        has_education_line=has_education_line,
+        summary_text=summary_text,
+        metric_count=sum(1 for _ in _METRIC_RE.finditer(cv_text)),
+        # Plain substring checks run in C and beat a regex alternation here
+        action_verbs=frozenset(verb for verb in ACTION_VERBS if verb in cv_text),
+        section_headers=tuple(section_headers),
+        headers_title_case=headers_title_case,
+        has_bullets=bool(_BULLET_RE.search(cv_text)),
+        indented_bullets=indented_bullets,
+        long_line_count=long_line_count,
+        pipe_count=cv_text.count('|'),
+        has_non_ascii=not cv_text.isascii(),
+        length=len(cv_text),
+    )
+
+
+# Capitalised only because they start a sentence or a heading; matched case-insensitively they'd be noise
+_JD_COMMON_WORDS = frozenset("""
+a about an and are as at be but by for from have if in is it join of on or our requirements
+responsibilities role team that the their this to we what who will with work you your experience
+""".split())
+
+
+def _is_acronym(word):
+    letters = [c for c in word if c.isalpha()]
+    return len(letters) >= 2 and all(c.isupper() for c in letters)
+
+
+def extract_job_keywords(job_description):
+    """
+    Capitalised phrases (within one line) and acronyms from a job description, the ATS keyword candidates.
+    Built from WORD_RE tokens: "Node.js", "CI/CD" and "AI/ML" are single keywords, as the matcher sees them.
+    """
+    keywords = set()
+    phrase_start = phrase_end = None
+
+    def end_phrase():
+        if phrase_start is not None:
+            phrase = job_description[phrase_start:phrase_end]
+            if phrase.lower() not in _JD_COMMON_WORDS:
+                keywords.add(phrase)
+
+    for match in WORD_RE.finditer(job_description):
+        word = match.group(0)
+        if _is_acronym(word):
+            keywords.add(word)
+        elif word[0].isupper():
+            # Capitalised words separated only by spaces/tabs form one phrase ("Machine Learning")
+            if phrase_start is not None and _PHRASE_GAP_RE.fullmatch(job_description, phrase_end, match.start()):
+                phrase_end = match.end()
+                continue
+            end_phrase()
+            phrase_start, phrase_end = match.span()
+            continue
+        end_phrase()
+        phrase_start = None
+    end_phrase()
+    return keywords
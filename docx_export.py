@@ -0,0 +1,192 @@
+import os
+import time
+import zipfile
+import itertools
+import threading
+from collections import deque
+
+# python-docx is only imported inside the worker processes (through docx_utils), so importing
+# this module stays cheap.
+
+
+def _render_document(layout, text):
+    # Runs in a worker process; each worker builds the styled template once and reuses it.
+    # Results aren't kept in the worker's render cache: every document of an export is different.
+    from docx_utils import render_markdown_docx
+    return render_markdown_docx(text, layout, cache=False)
+
+
+class _ChunkBuffer:
+    """Write-only, unseekable file object for zipfile: collects what's written until it's drained."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class DocxExporter:
+    """
+    Bulk DOCX export: renders many CVs and cover letters across a pool of worker processes
+    (DOCX_EXPORT_WORKERS) and streams them back as a ZIP archive. Documents are consumed
+    lazily and at most DOCX_EXPORT_MAX_IN_FLIGHT are being rendered or waiting to be written,
+    so memory stays flat however many are exported. Archive entries keep the input order.
+    Small exports (or a single worker) are rendered in-process; starting the pool isn't worth it.
+    """
+
+    # Layouts from docx_utils.LAYOUTS: 'cv' is generate_docx's formatting, 'markdown' create_docx_from_markdown's
+    LAYOUTS = ('cv', 'markdown')
+
+    def __init__(self, workers=None, max_in_flight=None, min_pool_documents=None):
+        self.workers = workers or int(os.getenv("DOCX_EXPORT_WORKERS", min(4, os.cpu_count() or 1)))
+        self.max_in_flight = max_in_flight or int(os.getenv("DOCX_EXPORT_MAX_IN_FLIGHT", self.workers * 4))
+        self.min_pool_documents = min_pool_documents if min_pool_documents is not None else 8
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+        self.exports = 0
+        self.documents = 0
+        self.bytes = 0
+        self.total_seconds = 0.0
+        self.last_export = None
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                # spawn: workers don't inherit the (threaded, possibly large) parent process
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _check(self, document):
+        filename, text, layout = document
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"Unknown DOCX layout '{layout}'")
+        return document
+
+    def _rendered(self, documents):
+        """Yields (filename, docx bytes) in input order, keeping at most max_in_flight renders pending."""
+        documents = map(self._check, documents)
+        # Peek far enough to decide whether the pool is worth starting
+        head = []
+        for document in documents:
+            head.append(document)
+            if len(head) >= self.min_pool_documents:
+                break
+        documents = itertools.chain(head, documents)
+        if self.workers <= 1 or len(head) < self.min_pool_documents:
+            for filename, text, layout in documents:
+                yield filename, _render_document(layout, text)
+            return
+
+        pool = self._get_pool()
+        pending = deque()
+        try:
+            for filename, text, layout in documents:
+                pending.append((filename, pool.submit(_render_document, layout, text)))
+                if len(pending) >= self.max_in_flight:
+                    filename, future = pending.popleft()
+                    yield filename, future.result()
+            while pending:
+                filename, future = pending.popleft()
+                yield filename, future.result()
+        finally:
+            # A consumer that stops early (client disconnected) shouldn't leave renders queued
+            for _, future in pending:
+                future.cancel()
+
+    def iter_zip(self, documents):
+        """
+        Renders (filename, markdown_text, layout) tuples and yields the ZIP archive holding them
+        in chunks, one or more entries at a time. DOCX files are already deflated, so entries are stored.
+        """
+        began = time.perf_counter()
+        count = 0
+        size = 0
+        seen = set()
+        buffer = _ChunkBuffer()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+            for filename, data in self._rendered(documents):
+                # Same name twice would make a valid archive that most tools can't extract
+                name, n = filename, 1
+                while name in seen:
+                    n += 1
+                    name = f"{os.path.splitext(filename)[0]} ({n}).docx"
+                seen.add(name)
+                archive.writestr(name, data)
+                count += 1
+                size += len(data)
+                yield buffer.drain()
+        yield buffer.drain()
+        self._record(count, size, time.perf_counter() - began)
+
+    def export_zip(self, documents, path):
+        """Writes the archive to `path` (via a temporary file) and returns this export's throughput."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for chunk in self.iter_zip(documents):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+        return self.last_export
+
+    def _record(self, count, size, elapsed):
+        export = {
+            "documents": count,
+            "bytes": size,
+            "seconds": round(elapsed, 3),
+            "documents_per_second": round(count / elapsed, 1) if elapsed else 0.0,
+        }
+        with self._lock:
+            self.exports += 1
+            self.documents += count
+            self.bytes += size
+            self.total_seconds += elapsed
+            self.last_export = export
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "exports": self.exports,
+                "documents": self.documents,
+                "bytes": self.bytes,
+                "workers": self.workers,
+                "documents_per_second": round(self.documents / self.total_seconds, 1) if self.total_seconds else 0.0,
+                "last_export": self.last_export,
+            }
+
+
+_docx_exporter = None
+_docx_exporter_lock = threading.Lock()
+
+
+def get_docx_exporter():
+    """Process-wide exporter so the worker pool is started once and shared."""
+    global _docx_exporter
+    with _docx_exporter_lock:
+        if _docx_exporter is None:
+            _docx_exporter = DocxExporter()
+        return _docx_exporter
@@ -0,0 +1,165 @@
+import io
+import os
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+
+# python-docx is imported when the template is first built, so importing this module stays cheap.
+
+# Parts of the default python-docx package that Word doesn't need: dropping them (the two
+# styles parts alone are ~800 KB of XML) is most of what makes loading and saving fast.
+_DROPPED_RELATIONSHIPS = frozenset(('stylesWithEffects', 'customXml', 'webSettings', 'thumbnail'))
+
+
+class DocxRenderer:
+    """
+    Renders CVs and cover letters to DOCX bytes.
+    A pre-styled template package (Calibri 11, only the styles the exporters use) is built once
+    per process; each render works on a deep copy of it instead of bootstrapping Document()
+    and restyling Normal. Rendered bytes are kept in a bounded LRU keyed by layout + a SHA-256
+    of the text, so a Streamlit rerun or repeated download of the same CV is a dictionary lookup.
+    """
+
+    FONT_NAME = 'Calibri'
+    FONT_SIZE = 11
+    # Paragraph styles kept in the template (plus the defaults and whatever these are based on / linked to)
+    STYLES = ('Normal', 'Title', 'Heading 1', 'Heading 2', 'Heading 3', 'List Bullet', 'List Paragraph')
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("DOCX_CACHE_MAX_ENTRIES", 64))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("DOCX_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+        self._template = None
+        self._template_lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _build_template(self):
+        from docx import Document
+        from docx.shared import Pt
+        from docx.oxml.ns import qn
+
+        doc = Document()
+        font = doc.styles['Normal'].font
+        font.name = self.FONT_NAME
+        font.size = Pt(self.FONT_SIZE)
+
+        for rels in (doc.part.rels, doc.part.package.rels):
+            for rId, rel in list(rels.items()):
+                if rel.reltype.rsplit('/', 1)[-1] in _DROPPED_RELATIONSHIPS:
+                    rels.pop(rId)
+
+        # Keep the styles we use and everything they depend on; latent styles only matter to Word's UI
+        styles = doc.styles.element
+        by_id = {style.get(qn('w:styleId')): style for style in styles.iterchildren(qn('w:style'))}
+        wanted = {name.lower() for name in self.STYLES}
+        pending = [
+            style_id for style_id, style in by_id.items()
+            if style.get(qn('w:default')) == '1' or style.find(qn('w:name')).get(qn('w:val')).lower() in wanted
+        ]
+        keep = set()
+        while pending:
+            style_id = pending.pop()
+            if style_id in keep or style_id not in by_id:
+                continue
+            keep.add(style_id)
+            for tag in ('w:basedOn', 'w:link', 'w:next'):
+                ref = by_id[style_id].find(qn(tag))
+                if ref is not None:
+                    pending.append(ref.get(qn('w:val')))
+        for style_id, style in by_id.items():
+            if style_id not in keep:
+                styles.remove(style)
+        latent = styles.find(qn('w:latentStyles'))
+        if latent is not None:
+            styles.remove(latent)
+        return doc
+
+    def new_document(self):
+        """A fresh, independent copy of the styled template."""
+        if self._template is None:
+            with self._template_lock:
+                if self._template is None:
+                    self._template = self._build_template()
+        return copy.deepcopy(self._template)
+
+    @staticmethod
+    def make_key(layout, text):
+        return f"{layout}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    @classmethod
+    def etag(cls, layout, text):
+        """
+        HTTP entity tag for a render, derived from the cache key so it can be checked without
+        rendering. Weak: the archive bytes differ between renders (zip timestamps), the document doesn't.
+        """
+        return f'W/"{cls.make_key(layout, text).replace(":", "-")}"'
+
+    def render(self, layout, text, build, cache=True):
+        """
+        Returns the DOCX bytes for `text`. On a cache miss, build(doc, text) fills a copy of the
+        template. `layout` names the builder, so different exporters never share cache entries.
+        cache=False renders without looking up or storing the result (one-off bulk exports).
+        """
+        if not cache:
+            return self._build(text, build)
+        key = self.make_key(layout, text)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        data = self._build(text, build)
+
+        with self._lock:
+            if key not in self._entries and len(data) <= self.max_bytes:
+                self._entries[key] = data
+                self._total_bytes += len(data)
+                while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._total_bytes -= len(evicted)
+        return data
+
+    def _build(self, text, build):
+        doc = self.new_document()
+        build(doc, text)
+        stream = io.BytesIO()
+        doc.save(stream)
+        return stream.getvalue()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
+
+
+_docx_renderer = None
+_docx_renderer_lock = threading.Lock()
+
+
+def get_docx_renderer():
+    """Process-wide renderer, so the template is built once and cached documents survive reruns."""
+    global _docx_renderer
+    with _docx_renderer_lock:
+        if _docx_renderer is None:
+            _docx_renderer = DocxRenderer()
+        return _docx_renderer
@@ -1,67 +1,324 @@
 import io
-from docx import Document
-from docx.shared import Pt
+import re
+from cv_document import parse_cv, TITLE, SECTION, SUBSECTION, BULLET
+from docx_renderer import get_docx_renderer
 
-def create_docx_from_markdown(markdown_text):
+# python-docx itself is only touched through the document the renderer hands us,
+# so importing this module stays cheap.
+
+# Backslash escapes and runs of '*' are the only inline syntax; everything else is text
+_INLINE_RE = re.compile(r'\\([\\*_`#-])|(\*+)')
+_FENCE_RE = re.compile(r'```(?:markdown)?')
+# Control characters that can't appear in XML (PDF-extracted text sometimes has them)
+_INVALID_XML_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+BOLD = 'bold'
+ITALIC = 'italic'
+
+
+class _Delimiter:
+    """A run of '*' in the source: what it closes, how many stars stay literal, and what it opens."""
+    __slots__ = ('closes', 'literal', 'opens')
+
+    def __init__(self):
+        self.closes = []
+        self.literal = 0
+        self.opens = []
+
+
+def tokenize_inline(text):
     """
-    Converts simple Markdown text to a docx file in memory.
-    Handles headers (#) and list items (- or *).
+    Splits one line of Markdown into runs: [(text, bold, italic), ...], adjacent runs merged.
+    '**' is bold, '*' italic, '***' both; they nest in any order. A '*' only opens before a
+    non-space and only closes after one, so "5 * 3" and stray or unbalanced stars stay literal.
+    Linear in the length of the line: every delimiter is pushed and popped at most once.
     """
-    doc = Document()
-    
-    # Set default font (optional, but good for consistency)
-    style = doc.styles['Normal']
-    font = style.font
-    font.name = 'Calibri'
-    font.size = Pt(11)
-
-    for line in markdown_text.splitlines():
-        line = line.strip()
-        if not line:
+    items = []
+    stack = []  # [delimiter, size] of unmatched openers, innermost last
+    pos = 0
+    for match in _INLINE_RE.finditer(text):
+        start, end = match.span()
+        if start > pos:
+            items.append(text[pos:start])
+        pos = end
+        if match.group(1) is not None:
+            items.append(match.group(1))
             continue
-            
-        if line.startswith('# '):
-            # Main Title (Name)
-            p = doc.add_heading(line[2:], level=1)
-            p.alignment = 1  # Center align
-        elif line.startswith('## '):
-            # Section Headers
-            p = doc.add_heading(line[3:], level=2)
-        elif line.startswith('### '):
-            # Sub-headers
-            p = doc.add_heading(line[4:], level=3)
-        elif line.startswith('- ') or line.startswith('* '):
-            # List Items
-            p = doc.add_paragraph(style='List Bullet')
-            process_bold(p, line[2:])
+
+        count = end - start
+        before = text[start - 1] if start else ' '
+        after = text[end] if end < len(text) else ' '
+        delimiter = _Delimiter()
+
+        if not before.isspace():
+            while count and stack:
+                opener = stack[-1]
+                size = min(opener[1], count, 2)
+                kind = BOLD if size == 2 else ITALIC
+                opener[0].opens.append(kind)
+                delimiter.closes.append(kind)
+                opener[1] -= size
+                count -= size
+                if not opener[1]:
+                    stack.pop()
+
+        if count and not after.isspace():
+            # "***" opens bold on the outside and italic on the inside
+            sizes = [2, 1] if count >= 3 else [count]
+            delimiter.literal = count - sum(sizes)
+            for size in sizes:
+                stack.append([delimiter, size])
         else:
-            # Normal Paragraph
-            p = doc.add_paragraph()
-            process_bold(p, line)
-            
-    # Save to BytesIO
-    file_stream = io.BytesIO()
-    doc.save(file_stream)
-    file_stream.seek(0)
-    return file_stream
+            delimiter.literal = count
+        items.append(delimiter)
+    if pos < len(text):
+        items.append(text[pos:])
+
+    # Openers that never closed print their stars
+    for opener, size in stack:
+        opener.literal += size
+
+    runs = []
+    bold = italic = 0
+    buffer = []
+
+    def flush():
+        if buffer:
+            chunk = ''.join(buffer)
+            buffer.clear()
+            if runs and runs[-1][1] == (bold > 0) and runs[-1][2] == (italic > 0):
+                runs[-1] = (runs[-1][0] + chunk, runs[-1][1], runs[-1][2])
+            else:
+                runs.append((chunk, bold > 0, italic > 0))
+
+    for item in items:
+        if isinstance(item, str):
+            buffer.append(item)
+            continue
+        if item.closes:
+            flush()
+            for kind in item.closes:
+                if kind == BOLD:
+                    bold -= 1
+                else:
+                    italic -= 1
+        if item.literal:
+            buffer.append('*' * item.literal)
+        if item.opens:
+            flush()
+            for kind in item.opens:
+                if kind == BOLD:
+                    bold += 1
+                else:
+                    italic += 1
+    flush()
+    return runs
+
+
+def strip_inline(text):
+    """The text of a line with its emphasis markers removed."""
+    return ''.join(run[0] for run in tokenize_inline(text))
+
+
+def add_runs(paragraph, runs):
+    for text, bold, italic in runs:
+        run = paragraph.add_run(text)
+        # Only set what's on: an explicit False writes a <w:b w:val="0"/> for every run
+        if bold:
+            run.bold = True
+        if italic:
+            run.italic = True
+
 
 def process_bold(paragraph, text):
     """
     Helper to parse **bold** and *italic* text in a string and add runs to a paragraph.
     Supports nested or mixed formatting like **bold** and *italic*.
     """
-    # Simple parser: split by ** first, then by *
-    # This is a basic implementation and might not handle complex nesting perfectly
-    parts = text.split('**')
-    for i, part in enumerate(parts):
-        is_bold = (i % 2 == 1)
-        
-        # Now split by * for italics
-        sub_parts = part.split('*')
-        for j, sub_part in enumerate(sub_parts):
-            is_italic = (j % 2 == 1)
-            
-            if sub_part:
-                run = paragraph.add_run(sub_part)
-                run.bold = is_bold
-                run.italic = is_italic
+    add_runs(paragraph, tokenize_inline(text))
+
+
+class Layout:
+    """How each kind of Markdown block is laid out in a DOCX."""
+    __slots__ = ('heading_styles', 'spacing', 'contact_header', 'uppercase_sections', 'skills_row')
+
+    def __init__(self, heading_styles, spacing=None, contact_header=False, uppercase_sections=False, skills_row=False):
+        # Block kind -> paragraph style name
+        self.heading_styles = heading_styles
+        # Block kind -> (space_before, space_after) in points
+        self.spacing = spacing or {}
+        # Lines above the first section become a centred name and a " | "-joined contact line
+        self.contact_header = contact_header
+        self.uppercase_sections = uppercase_sections
+        # Bullets under a "... Skills" section are joined into one justified " • " row
+        self.skills_row = skills_row
+
+
+LAYOUTS = {
+    # Plain Markdown export (Streamlit download)
+    'markdown': Layout({TITLE: 'Heading 1', SECTION: 'Heading 2', SUBSECTION: 'Heading 3'}),
+    # Formatted CV (CVProcessor.generate_docx / render_docx)
+    'cv': Layout(
+        {SECTION: 'Heading 1', SUBSECTION: 'Heading 2'},
+        spacing={SECTION: (12, 6), SUBSECTION: (6, 3)},
+        contact_header=True,
+        uppercase_sections=True,
+        skills_row=True,
+    ),
+}
+
+
+class MarkdownDocxWriter:
+    """
+    Emits a Markdown CV into a python-docx Document in one pass over its blocks.
+    Lines are classified by the shared parse (cv_document.parse_cv); emphasis is
+    tokenized per line by tokenize_inline. Only the contact header (until the first
+    section) and a skills row (until the next non-bullet) are buffered.
+    Paragraphs and runs are written as WordprocessingML elements directly: going through
+    python-docx's Paragraph/Run objects costs about a millisecond per line.
+    """
+
+    # Points -> twentieths of a point (spacing) and half-points (font size)
+    _TWIPS = 20
+    _HALF_POINTS = 2
+
+    def __init__(self, doc, layout):
+        from lxml.etree import SubElement
+
+        self.layout = layout
+        self._sub = SubElement
+        self._body = doc.element.body
+        # New paragraphs go before the body's section properties, which must stay last
+        self._sect_pr = self._body.find(_W + 'sectPr')
+        # Style objects are resolved once per document instead of by name for every paragraph
+        self._style_ids = {kind: doc.styles[name].style_id for kind, name in layout.heading_styles.items()}
+        self._bullet_style_id = doc.styles['List Bullet'].style_id
+
+        self._header = [] if layout.contact_header else None
+        self._skills = []
+        self._in_skills = False
+
+    def write(self, markdown_text):
+        markdown_text = _FENCE_RE.sub('', markdown_text).strip()
+        for block in parse_cv(markdown_text).blocks:
+            if self._header is not None:
+                if block.kind != SECTION:
+                    self._header.append(strip_inline(block.raw.strip().replace('# ', '')).strip())
+                    continue
+                self._flush_header()
+            self._emit(block)
+        if self._header is not None:
+            self._flush_header()
+        self._flush_skills()
+
+    def _paragraph(self, style_id=None, align=None, space_before=None, space_after=None):
+        sub = self._sub
+        p = self._body.makeelement(_W + 'p', {})
+        if style_id or align or space_before is not None or space_after is not None:
+            ppr = sub(p, _W + 'pPr')
+            if style_id:
+                sub(ppr, _W + 'pStyle', {_W + 'val': style_id})
+            if space_before is not None or space_after is not None:
+                spacing = sub(ppr, _W + 'spacing')
+                if space_before is not None:
+                    spacing.set(_W + 'before', str(space_before * self._TWIPS))
+                if space_after is not None:
+                    spacing.set(_W + 'after', str(space_after * self._TWIPS))
+            if align:
+                sub(ppr, _W + 'jc', {_W + 'val': align})
+        if self._sect_pr is not None:
+            self._sect_pr.addprevious(p)
+        else:
+            self._body.append(p)
+        return p
+
+    def _run(self, p, text, bold=False, italic=False, size=None):
+        sub = self._sub
+        r = sub(p, _W + 'r')
+        if bold or italic or size:
+            rpr = sub(r, _W + 'rPr')
+            if bold:
+                sub(rpr, _W + 'b')
+            if italic:
+                sub(rpr, _W + 'i')
+            if size:
+                sub(rpr, _W + 'sz', {_W + 'val': str(size * self._HALF_POINTS)})
+        t = sub(r, _W + 't')
+        t.text = _INVALID_XML_RE.sub('', text)
+        if text[:1].isspace() or text[-1:].isspace():
+            t.set(_XML_SPACE, 'preserve')
+
+    def _runs(self, p, runs):
+        for text, bold, italic in runs:
+            self._run(p, text, bold, italic)
+
+    def _emit(self, block):
+        kind = block.kind
+        if kind == BULLET and self._in_skills:
+            self._skills.append(tokenize_inline(block.text))
+            return
+        # Anything but another skill ends the row
+        self._flush_skills()
+
+        style_id = self._style_ids.get(kind)
+        if style_id is not None:
+            text = strip_inline(block.text)
+            if kind == SECTION:
+                self._in_skills = self.layout.skills_row and "SKILLS" in text.upper()
+                if self.layout.uppercase_sections:
+                    text = text.upper()
+            space_before, space_after = self.layout.spacing.get(kind, (None, None))
+            p = self._paragraph(style_id, 'center' if kind == TITLE else None, space_before, space_after)
+            if text:
+                self._run(p, text)
+        elif kind == BULLET:
+            self._runs(self._paragraph(self._bullet_style_id), tokenize_inline(block.text))
+        else:
+            self._runs(self._paragraph(), tokenize_inline(block.text))
+
+    def _flush_header(self):
+        header, self._header = self._header, None
+        if not header:
+            return
+        # Name (first line)
+        self._run(self._paragraph(align='center', space_after=6), header[0], bold=True, size=24)
+        # Contact info (joined by |)
+        contact = " | ".join(header[1:])
+        p = self._paragraph(align='center', space_after=18)
+        if contact:
+            self._run(p, contact, size=10)
+        # Spacer before the first section
+        self._paragraph(space_after=12)
+
+    def _flush_skills(self):
+        if not self._skills:
+            return
+        p = self._paragraph(align='both', space_after=12)
+        for i, runs in enumerate(self._skills):
+            if i:
+                self._run(p, " • ")
+            self._runs(p, runs)
+        self._skills = []
+
+
+def write_markdown_docx(doc, markdown_text, layout='markdown'):
+    """Fills `doc` from Markdown using one of LAYOUTS."""
+    MarkdownDocxWriter(doc, LAYOUTS[layout]).write(markdown_text)
+
+
+def render_markdown_docx(markdown_text, layout='markdown', cache=True):
+    """DOCX bytes for Markdown in the given layout, from the shared template and render cache."""
+    build = lambda doc, text: write_markdown_docx(doc, text, layout)
+    return get_docx_renderer().render(layout, markdown_text, build, cache=cache)
+
+
+def create_docx_from_markdown(markdown_text):
+    """
+    Converts simple Markdown text to a docx file in memory.
+    Handles headers (#), list items (- or *) and **bold** / *italic* text.
+    Rendered from the shared pre-styled template; repeated calls with the same text are served from cache.
+    """
+    return io.BytesIO(render_markdown_docx(markdown_text, 'markdown'))
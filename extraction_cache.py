@@ -0,0 +1,140 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Bump when the extraction logic changes so stale text isn't served from the disk tier
+EXTRACTOR_VERSION = 1
+
+
+class ExtractionCache:
+    """
+    Memoizes PDF text extraction by a SHA-256 of the file's bytes.
+    A bounded in-memory LRU serves reruns and repeated uploads; an optional directory
+    of text files (EXTRACTION_CACHE_DIR) keeps results across restarts and CLI runs.
+    """
+
+    def __init__(self, max_entries=None, disk_dir=None):
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", 64))
+        self.disk_dir = disk_dir if disk_dir is not None else os.getenv("EXTRACTION_CACHE_DIR", "")
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per key being extracted, so concurrent uploads of the same file parse it once
+        self._key_locks = {}
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(data):
+        return f"v{EXTRACTOR_VERSION}-{hashlib.sha256(data).hexdigest()}"
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.txt")
+
+    def get(self, key):
+        """Returns the cached text or None."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                    text = f.read()
+            except OSError:
+                text = None
+            if text is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, text)
+                return text
+        return None
+
+    def set(self, key, text):
+        # Failed extractions ("") are not cached so a retry can succeed
+        if not text:
+            return
+        self._remember(key, text)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Could not write extraction cache entry: {e}")
+
+    def _remember(self, key, text):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_extract(self, data, extract):
+        """Returns the text for `data`, calling extract() only if it isn't cached yet."""
+        key = self.make_key(data)
+        text = self.get(key)
+        if text is not None:
+            return text
+
+        with self._lock:
+            # [lock, threads using it]: the entry is only dropped by the last user, so a
+            # newcomer can never get a second lock for a key that is still being extracted
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                # Another thread may have finished the same file while we waited
+                text = self.get(key)
+                if text is not None:
+                    return text
+                with self._lock:
+                    self.misses += 1
+                text = extract()
+                self.set(key, text)
+                return text
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "disk_tier": bool(self.disk_dir),
+            }
+
+
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache():
+    """Process-wide instance shared by app.py, fastapi_backup.py and main.py."""
+    global _extraction_cache
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            _extraction_cache = ExtractionCache()
+        return _extraction_cache
@@ -1,16 +1,19 @@
 import os
-import shutil
+import asyncio
+import json
+import threading
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
+from urllib.parse import quote
 from dotenv import load_dotenv
 
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 
 # Import existing logic
-from cv_processor import CVProcessor
+from cv_processor import AsyncCVProcessor, PDFTooLargeError, PDFExtractionError
 from job_finder import JobFinder
 from google_handler import GoogleHandler
 
@@ -28,6 +31,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Uploads over the PDF limit are refused from their Content-Length, before the multipart body is
+# read (and spooled to disk). Room is left for the multipart boundaries and part headers.
+MAX_PDF_BYTES = int(os.getenv("MAX_PDF_BYTES", 10 * 1024 * 1024))
+MAX_UPLOAD_BYTES = MAX_PDF_BYTES + 64 * 1024
+
+@app.middleware("http")
+async def limit_upload_size(request, call_next):
+    if request.url.path == "/upload-cv":
+        length = request.headers.get("content-length", "")
+        if length.isdigit() and int(length) > MAX_UPLOAD_BYTES:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"The PDF is too large (limit {MAX_PDF_BYTES // (1024 * 1024)} MB). Please upload a smaller file."}
+            )
+    return await call_next(request)
+
 # Serve Static Files (Frontend)
 app.mount("/static", StaticFiles(directory="web"), name="static")
 
@@ -39,13 +58,43 @@ async def read_index():
 async def health_check():
     return {"status": "ok", "message": "Backend is running"}
 
+@app.get("/metrics")
+async def metrics():
+    """Gemini quota scheduler, response caches, request coalescing, PDF extraction and DOCX export statistics."""
+    from gemini_scheduler import get_scheduler
+    from llm_cache import get_llm_cache
+    from single_flight import get_single_flight
+    from extraction_cache import get_extraction_cache
+    from pdf_extractor import get_pdf_extractor
+    from docx_export import get_docx_exporter
+    from http_cache import get_response_cache
+    return {
+        "scheduler": get_scheduler().metrics(),
+        "cache": get_llm_cache().stats(),
+        "single_flight": get_single_flight().stats(),
+        "extraction_cache": get_extraction_cache().stats(),
+        "pdf_extractor": get_pdf_extractor().stats(),
+        "docx_export": get_docx_exporter().stats(),
+        "job_fetch_cache": get_response_cache().stats()
+    }
+
 # Initialize Handlers
-# Note: We initialize them globally for simplicity in this script.
-# In a production app, you might want dependency injection.
-try:
-    cv_processor = CVProcessor()
-    job_finder = JobFinder()
-    
+# Handlers (and the SDKs behind them) are created on first use rather than at import,
+# so the server starts and /health answers without waiting for Gemini/Google clients.
+_handlers = {}
+_handlers_lock = threading.Lock()
+
+def _get_handler(name, factory):
+    with _handlers_lock:
+        if name not in _handlers:
+            try:
+                _handlers[name] = factory()
+            except Exception as e:
+                print(f"Error initializing {name}: {e}")
+                _handlers[name] = None
+        return _handlers[name]
+
+def _create_google_handler():
     # Google Handler requires credentials
     base_dir = os.path.dirname(os.path.abspath(__file__))
     cred_path = os.path.join(base_dir, 'credentials.json')
@@ -53,16 +102,32 @@ try:
     
     # Check if we can initialize GoogleHandler
     if os.path.exists(cred_path) or os.path.exists(token_path):
-        google_handler = GoogleHandler(credentials_file=cred_path, token_file=token_path)
-    else:
-        google_handler = None
-        print("Warning: Google Credentials not found. Upload/Log features will be disabled.")
+        return GoogleHandler(credentials_file=cred_path, token_file=token_path)
+    print("Warning: Google Credentials not found. Upload/Log features will be disabled.")
+    return None
 
-except Exception as e:
-    print(f"Error initializing handlers: {e}")
-    cv_processor = None
-    job_finder = None
-    google_handler = None
+def get_cv_processor():
+    # Async processor so Gemini calls don't block the event loop
+    return _get_handler("cv_processor", AsyncCVProcessor)
+
+@app.on_event("startup")
+async def warm_up():
+    # Build the CV processor and its Gemini model in the background, so the first request
+    # doesn't import and configure the SDK on the event loop while /health still answers at once
+    def build():
+        cv_processor = get_cv_processor()
+        if cv_processor:
+            try:
+                cv_processor.model
+            except Exception as e:
+                print(f"Error building the Gemini model: {e}")
+    app.state.warm_up = asyncio.create_task(asyncio.to_thread(build))
+
+def get_job_finder():
+    return _get_handler("job_finder", JobFinder)
+
+def get_google_handler():
+    return _get_handler("google_handler", _create_google_handler)
 
 # Data Models
 class JobRequest(BaseModel):
@@ -88,38 +153,37 @@ def read_root():
 
 @app.post("/upload-cv")
 async def upload_cv(file: UploadFile = File(...)):
+    cv_processor = get_cv_processor()
     if not cv_processor:
         raise HTTPException(status_code=500, detail="CV Processor not initialized (Check API Key)")
     
     try:
-        # Save temp file
-        temp_filename = f"temp_{file.filename}"
-        with open(temp_filename, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        # Extract text
-        text = cv_processor.extract_text(temp_filename)
+        # Parse straight from the upload (no temp file in the CWD, so concurrent uploads can't collide);
+        # extraction is cached by file hash and shared with the Streamlit app and CLI
+        text = await asyncio.to_thread(cv_processor.extract_text, file.file)
         
         # Assess
-        assessment = cv_processor.assess_cv(text)
-        
-        # Cleanup
-        os.remove(temp_filename)
+        assessment = await cv_processor.assess_cv(text)
         
         return {
             "text": text,
             "assessment": assessment
         }
+    except PDFTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except PDFExtractionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/analyze-job")
 async def analyze_job(request: JobRequest):
+    job_finder = get_job_finder()
     if not job_finder:
         raise HTTPException(status_code=500, detail="Job Finder not initialized")
     
     try:
-        details = job_finder.extract_job_details(request.url)
+        details = await asyncio.to_thread(job_finder.extract_job_details, request.url)
         if not details:
             raise HTTPException(status_code=404, detail="Could not extract job details")
         return details
@@ -128,6 +192,7 @@ async def analyze_job(request: JobRequest):
 
 @app.post("/generate")
 async def generate_application(request: GenerateRequest):
+    cv_processor = get_cv_processor()
     if not cv_processor:
         raise HTTPException(status_code=500, detail="CV Processor not initialized")
     
@@ -140,12 +205,12 @@ async def generate_application(request: GenerateRequest):
             "summary": request.summary
         }
         
-        # Generate Cover Letter
-        cover_letter = cv_processor.generate_cover_letter(request.cv_text, job_info)
-        
-        # Tailor CV
+        # Generate Cover Letter and Tailor CV concurrently
         # We use the raw description for tailoring to ensure accuracy
-        tailored_cv = cv_processor.tailor_cv(request.cv_text, request.job_description)
+        cover_letter, tailored_cv = await asyncio.gather(
+            cv_processor.generate_cover_letter(request.cv_text, job_info),
+            cv_processor.tailor_cv(request.cv_text, request.job_description),
+        )
         
         # Validate
         validation = cv_processor.validate_cv(tailored_cv)
@@ -158,31 +223,140 @@ async def generate_application(request: GenerateRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+class BundleRequest(GenerateRequest):
+    additional_info: Optional[dict] = None
+
+@app.post("/generate-bundle")
+async def generate_application_bundle(request: BundleRequest):
+    """Tailored CV, cover letter, interview questions and outreach messages from a single model call."""
+    cv_processor = get_cv_processor()
+    if not cv_processor:
+        raise HTTPException(status_code=500, detail="CV Processor not initialized")
+    
+    try:
+        job_info = {
+            "title": request.job_title,
+            "company": request.company,
+            "description": request.job_description,
+            "summary": request.summary
+        }
+        bundle = await cv_processor.generate_application_bundle(request.cv_text, job_info, request.additional_info)
+        bundle["validation"] = cv_processor.validate_cv(bundle["tailored_cv"])
+        return bundle
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _sse_event(event, data):
+    # JSON-encode the payload so multi-line chunks stay a single SSE data line
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/generate/stream")
+async def generate_application_stream(request: GenerateRequest):
+    """
+    Server-Sent Events version of /generate.
+    Streams 'cover_letter' chunks, then 'tailored_cv' chunks, then a final 'done'
+    event with the validation report. Failures are sent as an 'error' event.
+    """
+    cv_processor = get_cv_processor()
+    if not cv_processor:
+        raise HTTPException(status_code=500, detail="CV Processor not initialized")
+    
+    job_info = {
+        "title": request.job_title,
+        "company": request.company,
+        "description": request.job_description,
+        "summary": request.summary
+    }
+    
+    def event_stream():
+        # Sync generator: Starlette iterates it in a worker thread
+        try:
+            for chunk in cv_processor.generate_cover_letter_stream(request.cv_text, job_info):
+                yield _sse_event("cover_letter", chunk)
+            
+            tailored_parts = []
+            for chunk in cv_processor.tailor_cv_stream(request.cv_text, request.job_description):
+                tailored_parts.append(chunk)
+                yield _sse_event("tailored_cv", chunk)
+            
+            validation = cv_processor.validate_cv("".join(tailored_parts))
+            yield _sse_event("done", {"validation": validation})
+        except Exception as e:
+            yield _sse_event("error", str(e))
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 class DownloadRequest(BaseModel):
     cv_text: str
     filename: str = "Tailored_CV.docx"
 
+DOCX_MEDIA_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+def _safe_filename(filename, extension, default="Document"):
+    # Letters, digits, spaces, '-' and '_' only, then the extension
+    if filename.lower().endswith(extension):
+        filename = filename[:-len(extension)]
+    return ("".join(c for c in filename if c.isalpha() or c.isdigit() or c in (' ', '-', '_')).rstrip() or default) + extension
+
+def _attachment(filename):
+    # RFC 6266: plain filename when it's ASCII, otherwise the UTF-8 encoded form
+    quoted = quote(filename)
+    if quoted == filename:
+        return f'attachment; filename="{filename}"'
+    return f"attachment; filename*=utf-8''{quoted}"
+
 @app.post("/download-docx")
 async def download_docx(request: DownloadRequest):
+    cv_processor = get_cv_processor()
     if not cv_processor:
         raise HTTPException(status_code=500, detail="CV Processor not initialized")
     
     try:
-        # Ensure filename is safe
-        safe_filename = "".join([c for c in request.filename if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).rstrip()
-        if not safe_filename.endswith('.docx'):
-            safe_filename += '.docx'
-            
-        # Generate file
-        filepath = cv_processor.generate_docx(request.cv_text, safe_filename)
+        safe_filename = _safe_filename(request.filename, ".docx", "Tailored_CV")
         
-        # Return file
-        return FileResponse(filepath, media_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document', filename=safe_filename)
+        # No 304 handling: conditional requests only apply to GET/HEAD, and this is a POST
+        headers = {"ETag": cv_processor.docx_etag(request.cv_text), "Content-Disposition": _attachment(safe_filename)}
+        
+        # Rendered in memory (repeat requests come from the renderer's bounded cache); nothing touches the disk
+        data = await asyncio.to_thread(cv_processor.render_docx, request.cv_text)
+        return Response(content=data, media_type=DOCX_MEDIA_TYPE, headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+class ExportDocument(BaseModel):
+    filename: str
+    text: str
+    # "cv" (formatted like /download-docx) or "markdown" (plain, for cover letters and the rest)
+    layout: str = "cv"
+
+class ExportRequest(BaseModel):
+    documents: list[ExportDocument]
+    filename: str = "Documents.zip"
+
+@app.post("/export-docx")
+async def export_docx(request: ExportRequest):
+    """Many CVs / cover letters as one streamed ZIP of DOCX files, rendered in a process pool."""
+    from docx_export import get_docx_exporter
+    exporter = get_docx_exporter()
+    bad = [d.layout for d in request.documents if d.layout not in exporter.LAYOUTS]
+    if bad:
+        raise HTTPException(status_code=422, detail=f"Unknown layout '{bad[0]}' (expected one of {', '.join(exporter.LAYOUTS)})")
+    
+    documents = ((_safe_filename(d.filename, ".docx"), d.text, d.layout) for d in request.documents)
+    # A sync iterator, so Starlette pulls the chunks in a worker thread rather than on the event loop
+    return StreamingResponse(
+        exporter.iter_zip(documents),
+        media_type="application/zip",
+        headers={"Content-Disposition": _attachment(_safe_filename(request.filename, ".zip"))}
+    )
+
 @app.post("/submit")
 async def submit_application(request: SubmitRequest):
+    google_handler = get_google_handler()
     if not google_handler:
         raise HTTPException(status_code=503, detail="Google Handler not initialized (Missing credentials)")
     
@@ -0,0 +1,206 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+
+from token_budget import count_tokens
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to `capacity` units, refilled continuously at `rate` per second."""
+
+    def __init__(self, capacity, rate):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+
+    def refill(self, now):
+        elapsed = now - self.last_refill
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.last_refill = now
+
+    def time_until(self, amount):
+        """Seconds until `amount` units are available (0 if they already are)."""
+        missing = amount - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate
+
+    def take(self, amount):
+        self.tokens -= amount
+
+    def drain(self):
+        self.tokens = 0.0
+
+
+class GeminiScheduler:
+    """
+    Process-wide admission control for Gemini requests.
+    Calls queue up in FIFO order and are only released when both the requests-per-minute
+    and tokens-per-minute buckets have room, so workers stop burning retries on 429s.
+    Limits come from GEMINI_RPM_LIMIT and GEMINI_TPM_LIMIT.
+    """
+
+    # Rough output allowance added to every estimate (a tailored CV is ~1-2k tokens)
+    DEFAULT_OUTPUT_TOKENS = 1500
+
+    def __init__(self, rpm=None, tpm=None):
+        self.rpm = rpm or int(os.getenv("GEMINI_RPM_LIMIT", 15))
+        self.tpm = tpm or int(os.getenv("GEMINI_TPM_LIMIT", 1000000))
+        self.requests = TokenBucket(self.rpm, self.rpm / 60.0)
+        self.tokens = TokenBucket(self.tpm, self.tpm / 60.0)
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._next_ticket = 0
+        # ticket -> (event loop, asyncio.Event) for coroutines waiting in acquire_async
+        self._async_waiters = {}
+
+        # Metrics
+        self.admitted = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_tokens = 0
+
+    def estimate_tokens(self, prompt, expected_output=None):
+        """
+        Estimates the cost of a call: prompt tokens plus an output allowance.
+        `prompt` may be the prompt text or an already-counted number of tokens.
+        """
+        if expected_output is None:
+            expected_output = self.DEFAULT_OUTPUT_TOKENS
+        if isinstance(prompt, int):
+            return prompt + expected_output
+        return count_tokens(prompt) + expected_output
+
+    def _enqueue(self):
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        self._queue.append(ticket)
+        return ticket
+
+    def _poll(self, ticket, cost):
+        """
+        Under the lock: takes the call's share of both buckets and returns (True, 0) if `ticket` may go now,
+        otherwise (False, seconds to wait), where None means until the queue moves.
+        """
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        if self._queue[0] != ticket:
+            return False, None
+        delay = max(self.requests.time_until(1), self.tokens.time_until(cost))
+        if delay > 0:
+            return False, delay
+        self.requests.take(1)
+        self.tokens.take(cost)
+        return True, 0.0
+
+    def _leave(self, ticket):
+        """Under the lock: removes a ticket (admitted or abandoned) and wakes every waiter."""
+        self._queue.remove(ticket)
+        self._notify()
+
+    def _notify(self):
+        self._cond.notify_all()
+        for loop, wakeup in self._async_waiters.values():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def _record(self, start, cost):
+        with self._cond:
+            waited = time.monotonic() - start
+            self.admitted += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self.total_tokens += int(cost)
+        return waited
+
+    def acquire(self, estimated_tokens):
+        """Blocks until the call may be sent. Returns the time spent waiting in seconds."""
+        # A single oversized call must still be admissible once the bucket is full
+        cost = min(float(estimated_tokens), self.tokens.capacity)
+        start = time.monotonic()
+
+        with self._cond:
+            ticket = self._enqueue()
+            try:
+                while True:
+                    admitted, delay = self._poll(ticket, cost)
+                    if admitted:
+                        break
+                    self._cond.wait(timeout=delay)
+            finally:
+                self._leave(ticket)
+        return self._record(start, cost)
+
+    async def acquire_async(self, estimated_tokens):
+        """
+        acquire() for coroutines, in the same FIFO queue. Waits with asyncio instead of holding
+        a thread, and a cancelled waiter leaves the queue without taking anything from the buckets.
+        """
+        cost = min(float(estimated_tokens), self.tokens.capacity)
+        start = time.monotonic()
+        wakeup = asyncio.Event()
+
+        with self._cond:
+            ticket = self._enqueue()
+            self._async_waiters[ticket] = (asyncio.get_running_loop(), wakeup)
+        try:
+            while True:
+                with self._cond:
+                    admitted, delay = self._poll(ticket, cost)
+                    if admitted:
+                        break
+                    # Cleared under the lock, so a wake-up for any later queue change still gets through
+                    wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._cond:
+                del self._async_waiters[ticket]
+                self._leave(ticket)
+        return self._record(start, cost)
+
+    def report_throttled(self):
+        """Called when the API still answered 429: empty the request bucket so everyone backs off."""
+        with self._cond:
+            self.throttled += 1
+            self.requests.drain()
+            self._notify()
+
+    def metrics(self):
+        with self._cond:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                "rpm_limit": self.rpm,
+                "tpm_limit": self.tpm,
+                "queue_depth": len(self._queue),
+                "admitted": self.admitted,
+                "throttled": self.throttled,
+                "avg_wait_seconds": round(self.total_wait / self.admitted, 3) if self.admitted else 0.0,
+                "max_wait_seconds": round(self.max_wait, 3),
+                "estimated_tokens_sent": self.total_tokens,
+                "requests_available": round(self.requests.tokens, 2),
+                "tokens_available": int(self.tokens.tokens),
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Returns the shared scheduler used by every CVProcessor in this process."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = GeminiScheduler()
+        return _scheduler
@@ -1,6 +1,7 @@
 import os
+import sys
 import pickle
-import streamlit as st
+import threading
 
 class GoogleHandler:
     SCOPES = [
@@ -16,11 +17,20 @@ class GoogleHandler:
         from googleapiclient.discovery import build
         
         self.creds = None
+        self.token_file = token_file
+        # One handler is shared by every Streamlit session / API worker: credential refresh and
+        # the (non thread-safe) httplib2 transport behind the Drive/Sheets clients go through this lock
+        self._lock = threading.RLock()
         
         # 1. Try Streamlit Secrets (Service Account)
-        if "gcp_service_account" in st.secrets:
+        # Only load Streamlit when we're running inside it or a secrets file exists (keeps CLI startup fast)
+        secrets = {}
+        if 'streamlit' in sys.modules or os.path.exists(os.path.join('.streamlit', 'secrets.toml')):
+            import streamlit as st
+            secrets = st.secrets
+        if "gcp_service_account" in secrets:
             try:
-                service_account_info = st.secrets["gcp_service_account"]
+                service_account_info = secrets["gcp_service_account"]
                 self.creds = service_account.Credentials.from_service_account_info(
                     service_account_info, scopes=self.SCOPES
                 )
@@ -52,12 +62,25 @@ class GoogleHandler:
                 self.creds = flow.run_local_server(port=0)
             
             # Save token for next run (only if using Flow/User auth)
-            with open(token_file, 'wb') as token:
-                pickle.dump(self.creds, token)
+            self._save_token()
 
         self.drive_service = build('drive', 'v3', credentials=self.creds)
         self.sheets_service = build('sheets', 'v4', credentials=self.creds)
 
+    def _save_token(self):
+        with open(self.token_file, 'wb') as token:
+            pickle.dump(self.creds, token)
+
+    def ensure_credentials(self):
+        """Refreshes expired user credentials once, even if several threads notice at the same time."""
+        with self._lock:
+            if self.creds.valid or not getattr(self.creds, 'refresh_token', None):
+                # Service-account credentials refresh themselves inside the API client
+                return
+            from google.auth.transport.requests import Request
+            self.creds.refresh(Request())
+            self._save_token()
+
     def upload_file(self, file_content, file_name, folder_id=None):
         """Uploads a file to Google Drive."""
         try:
@@ -71,7 +94,9 @@ class GoogleHandler:
             
             media = MediaIoBaseUpload(io.BytesIO(file_content.encode('utf-8')), mimetype='application/pdf', resumable=True)
             
-            file = self.drive_service.files().create(body=file_metadata, media_body=media, fields='id, webViewLink').execute()
+            with self._lock:
+                self.ensure_credentials()
+                file = self.drive_service.files().create(body=file_metadata, media_body=media, fields='id, webViewLink').execute()
             print(f"File ID: {file.get('id')}")
             return file.get('webViewLink')
         except Exception as e:
@@ -94,9 +119,11 @@ class GoogleHandler:
             
             body = {'values': values}
             
-            result = self.sheets_service.spreadsheets().values().append(
-                spreadsheetId=spreadsheet_id, range="Sheet1!A1",
-                valueInputOption="USER_ENTERED", body=body).execute()
+            with self._lock:
+                self.ensure_credentials()
+                result = self.sheets_service.spreadsheets().values().append(
+                    spreadsheetId=spreadsheet_id, range="Sheet1!A1",
+                    valueInputOption="USER_ENTERED", body=body).execute()
             
             print(f"{result.get('updates').get('updatedCells')} cells updated.")
             return True
@@ -108,15 +135,18 @@ class GoogleHandler:
         """Creates a new Google Sheet and returns its ID."""
         try:
             spreadsheet = {'properties': {'title': title}}
-            spreadsheet = self.sheets_service.spreadsheets().create(body=spreadsheet, fields='spreadsheetId').execute()
+            with self._lock:
+                self.ensure_credentials()
+                spreadsheet = self.sheets_service.spreadsheets().create(body=spreadsheet, fields='spreadsheetId').execute()
             print(f"Spreadsheet ID: {spreadsheet.get('spreadsheetId')}")
             
             # Add headers
             headers = [['Date', 'Company', 'Title', 'Job Link', 'Status', 'CV Link', 'Cover Letter Link']]
             body = {'values': headers}
-            self.sheets_service.spreadsheets().values().update(
-                spreadsheetId=spreadsheet.get('spreadsheetId'), range="Sheet1!A1",
-                valueInputOption="USER_ENTERED", body=body).execute()
+            with self._lock:
+                self.sheets_service.spreadsheets().values().update(
+                    spreadsheetId=spreadsheet.get('spreadsheetId'), range="Sheet1!A1",
+                    valueInputOption="USER_ENTERED", body=body).execute()
                 
             return spreadsheet.get('spreadsheetId')
         except Exception as e:
@@ -0,0 +1,214 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+
+_MAX_AGE_RE = re.compile(r'max-age\s*=\s*(\d+)')
+
+
+class CachedResponse:
+    """A stored response body with the validators needed to revalidate it."""
+    __slots__ = ('url', 'content', 'etag', 'last_modified', 'validated_at', 'max_age')
+
+    def __init__(self, url, content, etag, last_modified, validated_at, max_age):
+        self.url = url
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.validated_at = validated_at
+        self.max_age = max_age
+
+    def is_fresh(self, now=None):
+        return (now or time.time()) - self.validated_at < self.max_age
+
+    def conditional_headers(self):
+        """If-None-Match / If-Modified-Since for a revalidation request."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Disk-backed cache of fetched job postings, keyed by URL.
+    A response is served without any request while it's fresh (the server's Cache-Control
+    max-age, or HTTP_CACHE_FRESH_SECONDS when it doesn't say), then revalidated with its
+    ETag / Last-Modified so an unchanged posting costs a 304. Evicted least-recently-used.
+    """
+
+    def __init__(self, db_path=None, fresh_seconds=None, max_entries=None, max_bytes=None):
+        self.db_path = db_path or os.getenv("HTTP_CACHE_PATH", "http_cache.db")
+        self.fresh_seconds = fresh_seconds if fresh_seconds is not None else int(os.getenv("HTTP_CACHE_FRESH_SECONDS", 3600))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("HTTP_CACHE_MAX_ENTRIES", 200))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("HTTP_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def init_db(self):
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute('''CREATE TABLE IF NOT EXISTS http_cache
+                     (url TEXT PRIMARY KEY, content BLOB, etag TEXT, last_modified TEXT, size INTEGER,
+                      validated_at REAL, max_age REAL, last_access REAL)''')
+        c.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_access ON http_cache (last_access)")
+        conn.commit()
+        conn.close()
+
+    def max_age(self, headers):
+        """Seconds a response may be reused without revalidating; None if it mustn't be stored."""
+        cache_control = headers.get('Cache-Control', '').lower()
+        if 'no-store' in cache_control:
+            return None
+        if 'no-cache' in cache_control:
+            return 0
+        match = _MAX_AGE_RE.search(cache_control)
+        return int(match.group(1)) if match else self.fresh_seconds
+
+    def get(self, url):
+        """Returns the CachedResponse for a URL (fresh or not), or None."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                c = conn.cursor()
+                c.execute("SELECT content, etag, last_modified, validated_at, max_age FROM http_cache WHERE url=?", (url,))
+                row = c.fetchone()
+                if row is None:
+                    return None
+                c.execute("UPDATE http_cache SET last_access=? WHERE url=?", (time.time(), url))
+                conn.commit()
+                return CachedResponse(url, *row)
+            finally:
+                conn.close()
+
+    def set(self, url, content, headers):
+        """Stores a 200 response with its validators, unless the server said not to."""
+        max_age = self.max_age(headers)
+        if max_age is None:
+            return
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not max_age and not etag and not last_modified:
+            # Never fresh and can't be revalidated: storing it would only cost disk
+            return
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                c = conn.cursor()
+                c.execute("INSERT OR REPLACE INTO http_cache (url, content, etag, last_modified, size, validated_at, "
+                          "max_age, last_access) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                          (url, content, etag, last_modified, len(content), now, max_age, now))
+                self._evict(c)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def touch(self, cached, headers):
+        """Records a 304: the stored body is valid again, with any updated validators."""
+        max_age = self.max_age(headers)
+        cached.validated_at = time.time()
+        cached.max_age = max_age or 0
+        cached.etag = headers.get('ETag') or cached.etag
+        cached.last_modified = headers.get('Last-Modified') or cached.last_modified
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("UPDATE http_cache SET etag=?, last_modified=?, validated_at=?, max_age=? WHERE url=?",
+                             (cached.etag, cached.last_modified, cached.validated_at, cached.max_age, cached.url))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def delete(self, url):
+        """Drops a URL's entry (the posting was taken down)."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM http_cache WHERE url=?", (url,))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def record(self, outcome):
+        """
+        Counts a lookup as 'fresh' (no request), 'revalidated' (304), 'stale' (the request failed,
+        the old copy was used) or 'miss' (full download).
+        """
+        with self._lock:
+            if outcome == 'fresh':
+                self.fresh_hits += 1
+            elif outcome == 'stale':
+                self.stale_hits += 1
+            elif outcome == 'revalidated':
+                self.revalidated += 1
+            else:
+                self.misses += 1
+
+    def _evict(self, c):
+        c.execute("SELECT count(*), coalesce(sum(size), 0) FROM http_cache")
+        count, total_bytes = c.fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        c.execute("SELECT url, size FROM http_cache ORDER BY last_access ASC")
+        for url, size in c.fetchall():
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            c.execute("DELETE FROM http_cache WHERE url=?", (url,))
+            count -= 1
+            total_bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM http_cache")
+            conn.commit()
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute("SELECT count(*), coalesce(sum(size), 0) FROM http_cache")
+        entries, total_bytes = c.fetchone()
+        conn.close()
+
+        with self._lock:
+            lookups = self.fresh_hits + self.stale_hits + self.revalidated + self.misses
+            return {
+                "fresh_hits": self.fresh_hits,
+                "stale_hits": self.stale_hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": total_bytes,
+            }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide cache instance so counters survive Streamlit reruns."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache()
+        return _shared_cache
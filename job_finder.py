@@ -1,20 +1,118 @@
-import requests
-from bs4 import BeautifulSoup
+import os
+import threading
+from token_budget import trim_to_budget
 
 class JobFinder:
-    def __init__(self):
+    # Token budget for stored descriptions; prompts apply their own tighter budgets
+    MAX_DESCRIPTION_TOKENS = 2500
+    # Transient failures worth retrying (with exponential backoff; Retry-After is honoured)
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, connect_timeout=None, read_timeout=None, retries=None, pool_size=None, cache=None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
         }
+        self.timeout = (
+            connect_timeout or float(os.getenv("JOB_FETCH_CONNECT_TIMEOUT", 5)),
+            read_timeout or float(os.getenv("JOB_FETCH_READ_TIMEOUT", 20)),
+        )
+        self.retries = retries if retries is not None else int(os.getenv("JOB_FETCH_RETRIES", 3))
+        # Connections kept alive per host; batch mode fetches from several threads at once
+        self.pool_size = pool_size or int(os.getenv("JOB_FETCH_POOL_SIZE", 10))
+        self._cache = cache
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """One pooled session per JobFinder, created on first use (keeps DNS/TCP/TLS connections alive)."""
+        with self._session_lock:
+            if self._session is None:
+                # Imported on first use to keep startup fast
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                retry = Retry(
+                    total=self.retries,
+                    backoff_factor=0.5,
+                    status_forcelist=self.RETRY_STATUSES,
+                    allowed_methods=frozenset(["GET", "HEAD"]),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+                session = requests.Session()
+                session.headers.update(self.headers)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            from http_cache import get_response_cache
+            self._cache = get_response_cache()
+        return self._cache
+
+    def fetch(self, url):
+        """
+        Returns the body of a job posting. A cached copy that's still fresh is returned without a
+        request; an older one is revalidated with If-None-Match / If-Modified-Since (a 304 reuses it).
+        If the site can't be reached or has a server error, a stale cached copy is better than nothing;
+        a posting that's gone (404/410) is dropped from the cache and the error raised.
+        """
+        import requests
+
+        cached = self.cache.get(url)
+        if cached is not None and cached.is_fresh():
+            self.cache.record('fresh')
+            return cached.content
+
+        headers = cached.conditional_headers() if cached is not None else {}
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            return self._stale(cached, url, e)
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(cached, response.headers)
+            self.cache.record('revalidated')
+            return cached.content
+        if response.status_code in (404, 410):
+            self.cache.delete(url)
+        elif response.status_code >= 500:
+            try:
+                response.raise_for_status()
+            except requests.HTTPError as e:
+                return self._stale(cached, url, e)
+        response.raise_for_status()
+
+        self.cache.record('miss')
+        self.cache.set(url, response.content, response.headers)
+        return response.content
+
+    def _stale(self, cached, url, error):
+        if cached is None:
+            raise error
+        print(f"Fetching {url} failed ({error}); using the cached copy.")
+        self.cache.record('stale')
+        return cached.content
+
+    def cache_stats(self):
+        return self.cache.stats()
 
     def extract_job_details(self, url):
         """Extracts job description from a given URL."""
         try:
+            # Imported on first use to keep startup fast
+            from bs4 import BeautifulSoup
+            
             print(f"Fetching job details from {url}...")
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
+            content = self.fetch(url)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(content, 'html.parser')
             
             # Simple extraction: get title and all text
             # This is generic and might need site-specific tuning
@@ -34,7 +132,7 @@ class JobFinder:
             return {
                 "title": title,
                 "company": "Unknown Company", # Hard to extract generically
-                "description": description[:10000], # Limit length for LLM
+                "description": trim_to_budget(description, self.MAX_DESCRIPTION_TOKENS), # Drop nav/footer noise first
                 "link": url
             }
         except Exception as e:
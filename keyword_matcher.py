@@ -0,0 +1,253 @@
+import bisect
+import hashlib
+import functools
+import threading
+from collections import OrderedDict, deque
+
+from cv_signals import extract_job_keywords, WORD_RE
+
+# Words are the alphabet of the automaton; JD keywords are extracted from the same tokens
+_TOKEN_RE = WORD_RE
+
+# Common alternative spellings, matched as if they were the keyword itself
+SYNONYMS = {
+    "JavaScript": ["JS"],
+    "TypeScript": ["TS"],
+    "Kubernetes": ["k8s"],
+    "PostgreSQL": ["Postgres"],
+    "Machine Learning": ["ML"],
+    "Artificial Intelligence": ["AI"],
+    "Amazon Web Services": ["AWS"],
+    "AWS": ["Amazon Web Services"],
+    "Google Cloud Platform": ["GCP", "Google Cloud"],
+    "GCP": ["Google Cloud Platform", "Google Cloud"],
+    "Microsoft Azure": ["Azure"],
+    "Continuous Integration": ["CI"],
+    "CI/CD": ["CI CD", "Continuous Integration", "Continuous Delivery", "Continuous Deployment"],
+    "User Experience": ["UX"],
+    "User Interface": ["UI"],
+    "Search Engine Optimization": ["SEO"],
+    "Key Performance Indicators": ["KPI"],
+}
+
+
+def normalize_token(token):
+    """Folds case and simple variants (plurals, possessives) onto one form."""
+    if token.endswith("'s"):
+        token = token[:-2]
+    if len(token) >= 3 and token.endswith('s') and token[:-1].isupper():
+        # "APIs" -> "API"
+        token = token[:-1]
+    if len(token) <= 3 and token.isupper():
+        # Short acronyms keep their case so "IT" doesn't match "it"
+        return token
+    token = token.lower()
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        token = token[:-1]
+    return token
+
+
+# CVs reuse a small vocabulary, so normalized forms are memoized per raw word
+_normalized = {}
+_MAX_NORMALIZED = 100000
+
+
+def _normalize_cached(word):
+    token = _normalized.get(word)
+    if token is None:
+        if len(_normalized) >= _MAX_NORMALIZED:
+            _normalized.clear()
+        token = _normalized[word] = normalize_token(word)
+    return token
+
+
+def tokenize(text):
+    """Returns [(normalized_token, start, end)] for every word in `text`."""
+    return [(_normalize_cached(m.group(0)), m.start(), m.end()) for m in _TOKEN_RE.finditer(text)]
+
+
+# Tokenized lines, so re-scoring a CV the user just edited only re-tokenizes the changed lines
+_line_tokens = {}
+_MAX_LINES = 20000
+
+
+def _tokenize_line(line):
+    cached = _line_tokens.get(line)
+    if cached is None:
+        if len(_line_tokens) >= _MAX_LINES:
+            _line_tokens.clear()
+        matches = list(_TOKEN_RE.finditer(line))
+        cached = _line_tokens[line] = ([_normalize_cached(m[0]) for m in matches], [m.span() for m in matches])
+    return cached
+
+
+class _TokenStream:
+    """A CV's normalized tokens, with enough bookkeeping to map a token index back to a character span."""
+
+    def __init__(self, text):
+        self.tokens = []
+        self._line_first = []
+        self._line_info = []
+        offset = 0
+        for line in text.split('\n'):
+            tokens, spans = _tokenize_line(line)
+            if tokens:
+                self._line_first.append(len(self.tokens))
+                self._line_info.append((offset, spans))
+                self.tokens.extend(tokens)
+            offset += len(line) + 1
+
+    def spans(self, pairs):
+        """Maps (first_token, last_token) index pairs to (start, end) character offsets."""
+        line_first, line_info = self._line_first, self._line_info
+        result = []
+        for first, last in pairs:
+            line = bisect.bisect_right(line_first, first) - 1
+            offset, spans = line_info[line]
+            start = offset + spans[first - line_first[line]][0]
+            line = bisect.bisect_right(line_first, last) - 1
+            offset, spans = line_info[line]
+            result.append((start, offset + spans[last - line_first[line]][1]))
+        return result
+
+
+@functools.lru_cache(maxsize=32)
+def _token_stream(text):
+    return _TokenStream(text)
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over word tokens.
+    Every keyword (and its synonyms) is inserted once; matching walks the CV's tokens a
+    single time and reports every occurrence, so the cost no longer grows with the number
+    of keywords. Matching ignores case (except for short acronyms) and plural/possessive forms.
+    """
+
+    def __init__(self, keywords, synonyms=None):
+        synonyms = SYNONYMS if synonyms is None else synonyms
+        synonyms = {self._normalize_phrase(k): v for k, v in synonyms.items()}
+        self.keywords = sorted(set(keywords))
+        # Last few CVs scored against this JD (Streamlit re-validates the same text on every rerun)
+        self._results = OrderedDict()
+        self._results_lock = threading.Lock()
+
+        # Node 0 is the root; each node has goto edges, a failure link and the keywords ending there
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for keyword in self.keywords:
+            tokens = [t for t, _, _ in tokenize(keyword)]
+            if not tokens:
+                continue
+            self._add(tokens, keyword)
+            for alternative in synonyms.get(' '.join(tokens), []):
+                self._add([t for t, _, _ in tokenize(alternative)], keyword)
+        self._build_failure_links()
+
+    @staticmethod
+    def _normalize_phrase(text):
+        return ' '.join(t for t, _, _ in tokenize(text))
+
+    def _add(self, tokens, keyword):
+        node = 0
+        for token in tokens:
+            nxt = self._goto[node].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][token] = nxt
+            node = nxt
+        # Remember how many tokens the match spans to recover its start position
+        if (keyword, len(tokens)) not in self._out[node]:
+            self._out[node].append((keyword, len(tokens)))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0)
+                # Inherit matches that end at the fallback node (e.g. "learning" inside "machine learning")
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text):
+        """Returns {keyword: [(start, end), ...]} for every keyword occurring in `text`."""
+        goto, fail, out = self._goto, self._fail, self._out
+        root = goto[0]
+        stream = _token_stream(text)
+        found = {}
+        node = 0
+        for index, token in enumerate(stream.tokens):
+            if node == 0:
+                # Fast path: most CV words don't start any keyword
+                node = root.get(token, 0)
+                if node == 0:
+                    continue
+            else:
+                while node and token not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(token, 0)
+            for keyword, length in out[node]:
+                found.setdefault(keyword, []).append((index - length + 1, index))
+        # Token indexes -> character positions, once per keyword
+        return {keyword: stream.spans(pairs) for keyword, pairs in found.items()}
+
+    def match(self, text):
+        """Matched keywords with their positions, the missing ones, and the match rate. Treat as read-only."""
+        with self._results_lock:
+            result = self._results.get(text)
+            if result is not None:
+                self._results.move_to_end(text)
+                return result
+
+        found = self.find(text)
+        missing = [kw for kw in self.keywords if kw not in found]
+        result = {
+            "matched": found,
+            "missing": missing,
+            "match_rate": len(found) / max(len(self.keywords), 1),
+        }
+        with self._results_lock:
+            self._results[text] = result
+            while len(self._results) > 16:
+                self._results.popitem(last=False)
+        return result
+
+
+_matchers = OrderedDict()
+_matchers_lock = threading.Lock()
+_MAX_MATCHERS = 128
+
+
+def get_keyword_matcher(job_description):
+    """Returns the automaton for a job description, built once and cached by the JD's hash."""
+    key = hashlib.sha256(job_description.encode('utf-8')).hexdigest()
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is not None:
+            _matchers.move_to_end(key)
+            return matcher
+
+    matcher = KeywordMatcher(extract_job_keywords(job_description))
+    with _matchers_lock:
+        _matchers[key] = matcher
+        while len(_matchers) > _MAX_MATCHERS:
+            _matchers.popitem(last=False)
+    return matcher
+
+
+def clear_keyword_caches():
+    """Drops cached automatons, match results and tokenized text."""
+    with _matchers_lock:
+        _matchers.clear()
+    _token_stream.cache_clear()
+    _line_tokens.clear()
+    _normalized.clear()
@@ -0,0 +1,151 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+
+
+class LLMCache:
+    """
+    Disk-backed cache for Gemini responses.
+    Entries are keyed on the model name plus a SHA-256 of the prompt, expire after
+    a TTL and are evicted least-recently-used once the size limits are reached.
+    """
+
+    def __init__(self, db_path=None, ttl_seconds=None, max_entries=None, max_bytes=None):
+        self.db_path = db_path or os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("LLM_CACHE_MAX_ENTRIES", 500))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("LLM_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+        self.enabled = os.getenv("LLM_CACHE_DISABLED", "").lower() not in ("1", "true", "yes")
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def init_db(self):
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute('''CREATE TABLE IF NOT EXISTS llm_cache
+                     (key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER,
+                      created_at REAL, last_access REAL)''')
+        c.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache (last_access)")
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(model_name, prompt):
+        """Content address for a request: model name + hash of the exact prompt."""
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        return f"{model_name}:{digest}"
+
+    def get(self, key):
+        """Returns the cached response text, or None on a miss or expired entry."""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                c = conn.cursor()
+                c.execute("SELECT response, created_at FROM llm_cache WHERE key=?", (key,))
+                row = c.fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+
+                response, created_at = row
+                if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                    c.execute("DELETE FROM llm_cache WHERE key=?", (key,))
+                    conn.commit()
+                    self.misses += 1
+                    return None
+
+                c.execute("UPDATE llm_cache SET last_access=? WHERE key=?", (now, key))
+                conn.commit()
+                self.hits += 1
+                return response
+            finally:
+                conn.close()
+
+    def set(self, key, response, model_name=""):
+        """Stores a response and evicts old entries if the cache is over its limits."""
+        if not self.enabled or not response:
+            return
+
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            conn = self._connect()
+            try:
+                c = conn.cursor()
+                c.execute("INSERT OR REPLACE INTO llm_cache (key, model, response, size, created_at, last_access) "
+                          "VALUES (?, ?, ?, ?, ?, ?)", (key, model_name, response, size, now, now))
+                self._evict(c, now)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _evict(self, c, now):
+        # Drop expired entries first, then the least recently used until within limits
+        if self.ttl_seconds:
+            c.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            self.evictions += c.rowcount
+
+        c.execute("SELECT count(*), coalesce(sum(size), 0) FROM llm_cache")
+        count, total_bytes = c.fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        c.execute("SELECT key, size FROM llm_cache ORDER BY last_access ASC")
+        for key, size in c.fetchall():
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            c.execute("DELETE FROM llm_cache WHERE key=?", (key,))
+            count -= 1
+            total_bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM llm_cache")
+            conn.commit()
+            conn.close()
+
+    def stats(self):
+        """Hit/miss counters plus current size, for the debug panel and logs."""
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute("SELECT count(*), coalesce(sum(size), 0) FROM llm_cache")
+        entries, total_bytes = c.fetchone()
+        conn.close()
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total_bytes,
+        }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Process-wide cache instance so counters survive Streamlit reruns."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMCache()
+        return _shared_cache
@@ -1,12 +1,200 @@
 import os
+import re
 import sys
+import json
+import argparse
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from google_handler import GoogleHandler
 from cv_processor import CVProcessor
 from job_finder import JobFinder
 
-def main():
+CHECKPOINT_FILE = "checkpoint.json"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Job Hunter - tailor your CV and cover letter for job postings.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="File with one job URL or saved job description file per line (enables batch mode)")
+    parser.add_argument("--resume", metavar="PDF", help="Resume to tailor (default: resume.pdf next to main.py)")
+    parser.add_argument("--out", metavar="DIR", default="batch_output", help="Output directory for batch mode")
+    parser.add_argument("--workers", type=int, default=4, help="Number of jobs processed at the same time in batch mode")
+    parser.add_argument("--min-fit", type=int, default=0, metavar="SCORE",
+                        help="Batch mode: skip jobs whose local fit score (0-100) is below this, before any model call")
+    parser.add_argument("--export-docx", action="store_true",
+                        help="Batch mode: also export every finished job's CV and cover letter as DOCX into documents.zip")
+    return parser.parse_args(argv)
+
+def load_batch_entries(batch_file):
+    """Reads job URLs / JD file paths, skipping blank lines and # comments."""
+    base_dir = os.path.dirname(os.path.abspath(batch_file))
+    entries = []
+    with open(batch_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if not line.startswith(('http://', 'https://')) and not os.path.isabs(line):
+                line = os.path.join(base_dir, line)
+            if line not in entries:
+                entries.append(line)
+    return entries
+
+def job_slug(entry, index):
+    """Directory name for a job: position in the batch file + readable part of the URL/file name."""
+    name = entry.rstrip('/')
+    if name.startswith(('http://', 'https://')):
+        name = re.sub(r'^https?://(www\.)?', '', name)
+    else:
+        name = os.path.splitext(os.path.basename(name))[0]
+    name = re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_')[:60] or "job"
+    return f"{index:03d}_{name}"
+
+def load_checkpoint(out_dir):
+    path = os.path.join(out_dir, CHECKPOINT_FILE)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_checkpoint(out_dir, checkpoint):
+    # Write-then-rename so an interrupted run never leaves a corrupt checkpoint
+    path = os.path.join(out_dir, CHECKPOINT_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+def fetch_batch_entry(entry, job_finder):
+    """Fetches a job URL or reads a saved job description file."""
+    if entry.startswith(('http://', 'https://')):
+        job_details = job_finder.extract_job_details(entry)
+        if not job_details:
+            raise ValueError("Failed to extract job details")
+        return job_details
+    with open(entry, 'r', encoding='utf-8') as f:
+        description = f.read()
+    return {
+        "title": os.path.splitext(os.path.basename(entry))[0],
+        "company": "Unknown Company",
+        "description": description,
+        "link": entry
+    }
+
+def process_batch_entry(entry, job_dir, cv_text, cv_processor, job_finder, min_fit=0):
+    """
+    Fetches (or reads) one job, tailors the CV and cover letter and writes them to job_dir.
+    Returns (fit, validation); validation is None when the job was skipped for a fit below min_fit.
+    """
+    job_details = fetch_batch_entry(entry, job_finder)
+
+    # Local relevance check; low-fit jobs never reach the model
+    fit = cv_processor.score_job_fit(cv_text, job_details['description'])
+    if fit['fit_score'] < min_fit:
+        return fit, None
+
+    # One structured call for all artifacts (falls back to individual calls if needed)
+    bundle = cv_processor.generate_application_bundle(cv_text, job_details)
+    tailored_cv = bundle['tailored_cv']
+    validation = cv_processor.validate_ats_compatibility(tailored_cv, job_details['description'])
+
+    os.makedirs(job_dir, exist_ok=True)
+    for field in cv_processor.BUNDLE_FIELDS:
+        with open(os.path.join(job_dir, f"{field}.md"), 'w', encoding='utf-8') as f:
+            f.write(bundle[field])
+    with open(os.path.join(job_dir, "job.json"), 'w', encoding='utf-8') as f:
+        json.dump({**job_details, "fit": fit, "ats_report": validation}, f, indent=2)
+    return fit, validation
+
+def iter_batch_documents(checkpoint):
+    """(filename, markdown, layout) for the tailored CV and cover letter of every finished job."""
+    for result in checkpoint.values():
+        if result.get('status') != 'done':
+            continue
+        slug = os.path.basename(result['dir'])
+        for field, layout in (('tailored_cv', 'cv'), ('cover_letter', 'markdown')):
+            path = os.path.join(result['dir'], f"{field}.md")
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    yield f"{slug}/{field}.docx", f.read(), layout
+
+def export_batch_docx(out_dir, checkpoint):
+    from docx_export import get_docx_exporter
+    path = os.path.join(out_dir, "documents.zip")
+    report = get_docx_exporter().export_zip(iter_batch_documents(checkpoint), path)
+    print(f"Exported {report['documents']} DOCX files to {path} in {report['seconds']}s "
+          f"({report['documents_per_second']} documents/s).")
+
+def run_batch(args, base_dir):
+    """Tailors one CV against every job in args.batch, resuming from the checkpoint in args.out."""
+    resume_path = args.resume or os.path.join(base_dir, "resume.pdf")
+    if not os.path.exists(resume_path):
+        print(f"Resume not found at {resume_path}.")
+        return
+
+    try:
+        cv_processor = CVProcessor()
+        job_finder = JobFinder()
+    except Exception as e:
+        print(f"Initialization Error: {e}")
+        return
+
+    entries = load_batch_entries(args.batch)
+    os.makedirs(args.out, exist_ok=True)
+    checkpoint = load_checkpoint(args.out)
+    # Skipped jobs are re-checked, so a lower --min-fit on the next run picks them up
+    pending = [(i, e) for i, e in enumerate(entries, 1) if checkpoint.get(e, {}).get('status') != 'done']
+    print(f"{len(entries)} jobs in batch, {len(entries) - len(pending)} already done, {len(pending)} to process.")
+    if not pending:
+        if args.export_docx:
+            export_batch_docx(args.out, checkpoint)
+        return
+
+    # Extract the CV once for the whole batch
+    print("Reading CV...")
+    try:
+        cv_text = cv_processor.extract_text(resume_path)
+    except ValueError as e:
+        print(f"Could not read CV: {e}")
+        return
+    if not cv_text:
+        print("Could not read CV text.")
+        return
+
+    lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {}
+        for index, entry in pending:
+            job_dir = os.path.join(args.out, job_slug(entry, index))
+            futures[executor.submit(process_batch_entry, entry, job_dir, cv_text, cv_processor, job_finder, args.min_fit)] = (entry, job_dir)
+
+        for future in as_completed(futures):
+            entry, job_dir = futures[future]
+            try:
+                fit, validation = future.result()
+                if validation is None:
+                    result = {"status": "skipped", "fit_score": fit['fit_score']}
+                    print(f"- {entry}: skipped (fit {fit['fit_score']}/100 < {args.min_fit})")
+                else:
+                    result = {"status": "done", "dir": job_dir, "ats_score": validation['score'], "fit_score": fit['fit_score']}
+                    print(f"✓ {entry} -> {job_dir} (fit {fit['fit_score']}/100, ATS {validation['score']}/100)")
+            except Exception as e:
+                result = {"status": "failed", "error": str(e)}
+                print(f"✗ {entry}: {e}")
+            with lock:
+                checkpoint[entry] = result
+                save_checkpoint(args.out, checkpoint)
+
+    failed = sum(1 for r in checkpoint.values() if r.get('status') == 'failed')
+    print(f"Batch finished. Outputs in {args.out}. {failed} failed (re-run the same command to retry them).")
+    print(f"Gemini scheduler: {cv_processor.scheduler_metrics()}")
+    if args.export_docx:
+        export_batch_docx(args.out, checkpoint)
+
+def main(argv=None):
+    args = parse_args(argv)
+    
     # Load environment variables
     load_dotenv()
     
@@ -14,6 +202,10 @@ def main():
     if not os.getenv("GOOGLE_API_KEY"):
         print("Error: Please set GOOGLE_API_KEY in .env file.")
         return
+    
+    if args.batch:
+        run_batch(args, os.path.dirname(os.path.abspath(__file__)))
+        return
 
     # Initialize handlers
     # Initialize handlers
@@ -32,13 +224,17 @@ def main():
     print("Welcome to Job Hunter!")
     
     # 1. Assess CV
-    resume_path = os.path.join(base_dir, "resume.pdf")
+    resume_path = args.resume or os.path.join(base_dir, "resume.pdf")
     if not os.path.exists(resume_path):
         print(f"Resume not found at {resume_path}. Please place your resume in the project folder.")
         return
         
     print("Reading CV...")
-    cv_text = cv_processor.extract_text(resume_path)
+    try:
+        cv_text = cv_processor.extract_text(resume_path)
+    except ValueError as e:
+        print(f"Could not read CV: {e}")
+        return
     if not cv_text:
         print("Could not read CV text.")
         return
@@ -59,6 +255,8 @@ def main():
     
     if job_details:
         print(f"Found Job: {job_details['title']}")
+        fit = cv_processor.score_job_fit(cv_text, job_details['description'])
+        print(f"Local fit: {fit['fit_score']}/100 (matching: {', '.join(t for t, _ in fit['top_terms'][:5]) or 'none'})")
         
         # Tailor CV and Cover Letter
         print("Generating Cover Letter...")
@@ -113,6 +311,7 @@ def main():
         }
         
         google_handler.log_job(job_data, spreadsheet_id)
+        print(f"Gemini scheduler: {cv_processor.scheduler_metrics()}")
         print("Done!")
     else:
         print("Failed to extract job details.")
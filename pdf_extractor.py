@@ -0,0 +1,293 @@
+import io
+import os
+import time
+import queue
+import threading
+
+# PyPDF2 is only imported inside the sandbox workers; the parent process never parses PDFs itself
+
+
+class PDFExtractionError(ValueError):
+    """Raised when a PDF can't be parsed safely (malformed, too many pages, too slow or too large)."""
+
+
+def iter_pages(reader, start=0, stop=None):
+    """Yields (page_number, text, seconds) for each page, parsing lazily one page at a time."""
+    pages = reader.pages
+    stop = len(pages) if stop is None else min(stop, len(pages))
+    for index in range(start, stop):
+        began = time.perf_counter()
+        text = pages[index].extract_text() or ""
+        yield index + 1, text, time.perf_counter() - began
+
+
+def _limit_memory(max_bytes):
+    """Caps the worker's address space so a runaway parse fails with MemoryError instead of swapping the node."""
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows; the parent's RSS watchdog still applies
+        return
+    # Address space runs well ahead of RSS (shared libraries, arenas), hence the headroom
+    limit = max_bytes * 2
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _worker_main(conn, max_memory_bytes):
+    """Sandbox process: parses page ranges sent over `conn` until told to stop."""
+    _limit_memory(max_memory_bytes)
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+
+        start, stop, max_pages = job
+        try:
+            data = conn.recv_bytes()
+        except (EOFError, OSError):
+            return
+        try:
+            import PyPDF2
+            reader = PyPDF2.PdfReader(io.BytesIO(data))
+            total = len(reader.pages)
+            if max_pages and total > max_pages:
+                conn.send(("error", f"The PDF has {total} pages (limit {max_pages}). Please upload a shorter document.", False))
+                continue
+            conn.send(("ok", (total, list(iter_pages(reader, start, stop))), False))
+        except MemoryError:
+            # The heap may be in a bad state: report and exit so the worker is replaced
+            conn.send(("error", "The PDF needs too much memory to parse.", True))
+            return
+        except Exception as e:
+            conn.send(("error", f"Could not parse the PDF: {e}", False))
+
+
+def _rss_bytes(pid):
+    """Resident set size of `pid`, or None where /proc isn't available."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _SandboxWorker:
+    """One long-lived parser process and the pipe used to talk to it."""
+
+    POLL_SECONDS = 0.05
+
+    def __init__(self, ctx, max_memory_bytes):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, max_memory_bytes), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.max_memory_bytes = max_memory_bytes
+
+    def run(self, data, job, deadline):
+        """
+        Sends the PDF and a (start, stop, max_pages) job and waits for its result.
+        Returns (status, payload, fatal); fatal means the worker must not be reused.
+        """
+        try:
+            self.conn.send(job)
+            # Written straight from the caller's buffer: bytes or a memoryview, never pickled or copied here
+            self.conn.send_bytes(data)
+            while not self.conn.poll(self.POLL_SECONDS):
+                if time.monotonic() > deadline:
+                    return "error", "Reading the PDF took too long. The file may be damaged.", True
+                rss = _rss_bytes(self.process.pid)
+                if rss is not None and rss > self.max_memory_bytes:
+                    return "error", "The PDF needs too much memory to parse.", True
+                if not self.process.is_alive():
+                    break
+            return self.conn.recv()
+        except (EOFError, OSError, BrokenPipeError):
+            # The worker died mid-parse (e.g. killed by the address-space limit)
+            return "error", "The PDF parser crashed on this file.", True
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class PDFExtractor:
+    """
+    Sandboxed, linear-time PDF text extraction.
+    Parsing runs in a small pool of worker processes (PDF_WORKERS) with a wall-clock deadline
+    per document (PDF_TIMEOUT_SECONDS), a memory cap (PDF_MAX_MEMORY_MB) and a page limit
+    (PDF_MAX_PAGES); a worker that times out or blows its memory budget is killed and replaced.
+    Pages are streamed and joined once; documents with more than PDF_PARALLEL_PAGES pages
+    have their remaining pages split across workers. Per-page timings are kept for the debug panel.
+    """
+
+    def __init__(self, parallel_pages=None, workers=None, slow_page_seconds=None,
+                 timeout_seconds=None, max_memory_mb=None, max_pages=None):
+        self.parallel_pages = parallel_pages or int(os.getenv("PDF_PARALLEL_PAGES", 20))
+        self.workers = workers or int(os.getenv("PDF_WORKERS", min(4, os.cpu_count() or 1)))
+        self.slow_page_seconds = slow_page_seconds or float(os.getenv("PDF_SLOW_PAGE_SECONDS", 1.0))
+        self.timeout_seconds = timeout_seconds or float(os.getenv("PDF_TIMEOUT_SECONDS", 20))
+        self.max_memory_bytes = (max_memory_mb or int(os.getenv("PDF_MAX_MEMORY_MB", 512))) * 1024 * 1024
+        self.max_pages = max_pages if max_pages is not None else int(os.getenv("PDF_MAX_PAGES", 200))
+
+        self._ctx = None
+        self._idle = queue.LifoQueue()
+        self._started = 0
+        self._lock = threading.Lock()
+
+        self.documents = 0
+        self.parallel_documents = 0
+        self.failures = 0
+        self.recycled = 0
+        self.pages = 0
+        self.total_seconds = 0.0
+        self.last_page_timings = []
+        self.slow_pages = []
+
+    def _checkout(self, deadline):
+        with self._lock:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if self._started < self.workers:
+                if self._ctx is None:
+                    import multiprocessing
+                    # spawn: workers don't inherit the (threaded, possibly large) parent process
+                    self._ctx = multiprocessing.get_context("spawn")
+                self._started += 1
+                try:
+                    return _SandboxWorker(self._ctx, self.max_memory_bytes)
+                except Exception:
+                    self._started -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            raise PDFExtractionError("The PDF reader is busy. Please try again in a moment.")
+
+    def _discard(self, worker):
+        worker.kill()
+        with self._lock:
+            self._started -= 1
+            self.recycled += 1
+
+    def _run(self, data, start, stop, deadline, max_pages=0):
+        worker = self._checkout(deadline)
+        try:
+            status, payload, fatal = worker.run(data, (start, stop, max_pages), deadline)
+        except BaseException:
+            # Whatever state the worker is in, it can't be handed to the next job
+            self._discard(worker)
+            raise
+        if fatal:
+            self._discard(worker)
+        else:
+            self._idle.put(worker)
+        if status != "ok":
+            raise PDFExtractionError(payload)
+        return payload
+
+    def extract(self, data):
+        """
+        Returns the text of every page, concatenated in page order. Raises PDFExtractionError.
+        `data` may be bytes, a bytearray or a memoryview; it's sent to the workers without copying.
+        """
+        began = time.perf_counter()
+        deadline = time.monotonic() + self.timeout_seconds
+
+        try:
+            # The first job also reports the page count (and enforces the page limit)
+            total, results = self._run(data, 0, self.parallel_pages, deadline, self.max_pages)
+            parallel = total > self.parallel_pages
+            if parallel:
+                results = results + self._extract_rest(data, total, deadline)
+        except PDFExtractionError:
+            with self._lock:
+                self.failures += 1
+            raise
+
+        texts = []
+        timings = []
+        for page_number, text, seconds in results:
+            texts.append(text)
+            timings.append((page_number, round(seconds, 4)))
+
+        self._record(timings, time.perf_counter() - began, parallel)
+        return "".join(texts)
+
+    def _extract_rest(self, data, total, deadline):
+        from concurrent.futures import ThreadPoolExecutor
+        remaining = total - self.parallel_pages
+        chunk = -(-remaining // self.workers)
+        starts = range(self.parallel_pages, total, chunk)
+        # Threads only wait on worker pipes; the parsing itself happens in the sandbox processes
+        with ThreadPoolExecutor(max_workers=len(starts)) as pool:
+            futures = [pool.submit(self._run, data, start, start + chunk, deadline) for start in starts]
+            results = []
+            # Consumed in submission order, so pages stay in document order
+            for future in futures:
+                results.extend(future.result()[1])
+        return results
+
+    def _record(self, timings, elapsed, parallel):
+        slow = [(page, seconds) for page, seconds in timings if seconds >= self.slow_page_seconds]
+        if slow:
+            print(f"Slow PDF: {len(slow)} of {len(timings)} pages took over {self.slow_page_seconds}s "
+                  f"(slowest: page {max(slow, key=lambda p: p[1])[0]})")
+        with self._lock:
+            self.documents += 1
+            self.parallel_documents += int(parallel)
+            self.pages += len(timings)
+            self.total_seconds += elapsed
+            self.last_page_timings = timings
+            self.slow_pages = sorted(self.slow_pages + slow, key=lambda p: -p[1])[:10]
+
+    def shutdown(self):
+        """Stops idle workers (busy ones are replaced lazily)."""
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.kill()
+            with self._lock:
+                self._started -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": self.documents,
+                "parallel_documents": self.parallel_documents,
+                "failures": self.failures,
+                "workers_recycled": self.recycled,
+                "workers_running": self._started,
+                "pages": self.pages,
+                "avg_seconds_per_page": round(self.total_seconds / self.pages, 4) if self.pages else 0.0,
+                "last_page_timings": self.last_page_timings,
+                "slow_pages": self.slow_pages,
+            }
+
+
+_pdf_extractor = None
+_pdf_extractor_lock = threading.Lock()
+
+
+def get_pdf_extractor():
+    """Process-wide extractor so the sandbox workers are started once and shared."""
+    global _pdf_extractor
+    with _pdf_extractor_lock:
+        if _pdf_extractor is None:
+            _pdf_extractor = PDFExtractor()
+        return _pdf_extractor
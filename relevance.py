@@ -0,0 +1,227 @@
+import os
+import math
+import hashlib
+import sqlite3
+import functools
+import threading
+from collections import Counter
+
+from keyword_matcher import tokenize
+
+# Words that carry no signal about fit, whatever the job
+STOP_WORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could did do does
+doing during each either etc every for from had has have having he her here his how i if in into is it its
+just may me more most must my no not of on or other our out over own per please role same she should so
+some such than that the their them then there these they this those through to under up us very was we
+well were what when where which while who whom why will with within would you your yours
+ability able nice plus needed candidate candidates company experience including job looking opportunity position
+preferred required requirement responsibilities responsibility strong team work working year
+""".split())
+
+
+@functools.lru_cache(maxsize=256)
+def _analyze(text):
+    """
+    Normalized term counts for a text, plus the first spelling of each term as written
+    (terms are folded, so "Kubernetes" is counted as "kubernete"). Cached: a batch scores
+    one CV against many jobs. Treat the results as read-only.
+    """
+    terms = Counter()
+    spellings = {}
+    for token, start, end in tokenize(text):
+        word = text[start:end]
+        if len(token) > 1 and word.lower() not in STOP_WORDS and not token.isdigit():
+            terms[token] += 1
+            spellings.setdefault(token, word)
+    return terms, spellings
+
+
+def _term_counts(text):
+    return _analyze(text)[0]
+
+
+class RelevanceEngine:
+    """
+    Local CV-to-job relevance: BM25 and TF-IDF cosine over normalized tokens, no model calls.
+    Inverse document frequencies come from every job description seen so far. The corpus
+    statistics (document count, total length, per-term document frequency) live in SQLite
+    and are updated incrementally as new descriptions arrive; a description is counted once.
+    """
+
+    K1 = 1.5
+    B = 0.75
+    # Weight of the BM25 coverage in the fit score; the rest is TF-IDF cosine
+    BM25_WEIGHT = 0.6
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.getenv("RELEVANCE_DB_PATH", "relevance_stats.db")
+        self._lock = threading.Lock()
+        self._doc_hashes = set()
+        self._doc_freq = Counter()
+        self._total_length = 0
+        self.init_db()
+        self._load()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def init_db(self):
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute("CREATE TABLE IF NOT EXISTS relevance_docs (hash TEXT PRIMARY KEY, length INTEGER)")
+        c.execute("CREATE TABLE IF NOT EXISTS relevance_terms (term TEXT PRIMARY KEY, df INTEGER)")
+        conn.commit()
+        conn.close()
+
+    def _load(self):
+        conn = self._connect()
+        try:
+            c = conn.cursor()
+            for doc_hash, length in c.execute("SELECT hash, length FROM relevance_docs"):
+                self._doc_hashes.add(doc_hash)
+                self._total_length += length
+            for term, df in c.execute("SELECT term, df FROM relevance_terms"):
+                self._doc_freq[term] = df
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _hash(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def add_documents(self, job_descriptions):
+        """
+        Adds job descriptions to the corpus statistics, skipping empty ones and ones already counted.
+        Other engines (processes) may share the database: document frequencies are only incremented
+        for descriptions whose row this engine actually inserted. Returns how many were new here.
+        """
+        candidates = []
+        with self._lock:
+            seen = set()
+            for description in job_descriptions:
+                if not description or not description.strip():
+                    continue
+                doc_hash = self._hash(description)
+                if doc_hash in self._doc_hashes or doc_hash in seen:
+                    continue
+                terms = _term_counts(description)
+                if not terms:
+                    continue
+                seen.add(doc_hash)
+                candidates.append((doc_hash, sum(terms.values()), terms))
+            if not candidates:
+                return 0
+
+            inserted = []
+            conn = self._connect()
+            try:
+                c = conn.cursor()
+                # One write transaction: a description counted by another engine in the meantime
+                # is seen here as an ignored insert and its terms aren't counted twice
+                c.execute("BEGIN IMMEDIATE")
+                for doc_hash, length, terms in candidates:
+                    c.execute("INSERT OR IGNORE INTO relevance_docs (hash, length) VALUES (?, ?)", (doc_hash, length))
+                    if c.rowcount:
+                        inserted.append(terms)
+                new_terms = Counter()
+                for terms in inserted:
+                    new_terms.update(terms.keys())
+                c.executemany("INSERT INTO relevance_terms (term, df) VALUES (?, ?) "
+                              "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df", new_terms.items())
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+            # The in-memory statistics mirror the database, which now holds every candidate
+            # (ours, or counted by another engine since we loaded)
+            for doc_hash, length, terms in candidates:
+                self._doc_hashes.add(doc_hash)
+                self._total_length += length
+                self._doc_freq.update(terms.keys())
+        return len(inserted)
+
+    def idf(self, term):
+        """BM25 inverse document frequency (always positive, even for terms in every document)."""
+        n = len(self._doc_hashes)
+        df = self._doc_freq.get(term, 0)
+        # Clamped: a df above the document count (stats from an older version) must not turn weights negative
+        return max(0.0, math.log(1 + (n - df + 0.5) / (df + 0.5)))
+
+    def _bm25_weights(self, terms):
+        # Per-term BM25 weight of a job's terms, with length normalization against the corpus average
+        length = sum(terms.values())
+        avg_length = self._total_length / max(len(self._doc_hashes), 1) or 1
+        norm = self.K1 * (1 - self.B + self.B * length / avg_length)
+        return {term: self.idf(term) * tf * (self.K1 + 1) / (tf + norm) for term, tf in terms.items()}
+
+    def _tfidf_vector(self, terms):
+        return {term: (1 + math.log(tf)) * self.idf(term) for term, tf in terms.items()}
+
+    def score(self, cv_text, job_description, top_n=10, update=True):
+        """
+        Scores how well a CV fits one job. Returns a dict with 'fit_score' (0-100), the raw 'bm25'
+        score, 'bm25_coverage' (BM25 of the CV's terms relative to the job's best possible),
+        'tfidf_cosine', the 'top_terms' that contributed most and the heaviest 'missing_terms'.
+        """
+        if update:
+            self.add_documents([job_description])
+        cv_terms = _term_counts(cv_text)
+        job_terms, spellings = _analyze(job_description)
+
+        with self._lock:
+            weights = self._bm25_weights(job_terms)
+            cv_vector = self._tfidf_vector(cv_terms)
+            job_vector = self._tfidf_vector(job_terms)
+
+        # The CV is the query: each of its terms counts once, so the job's own terms are the upper bound
+        contributions = {term: weight for term, weight in weights.items() if term in cv_terms}
+        bm25 = sum(contributions.values())
+        best = sum(weights.values())
+        coverage = bm25 / best if best else 0.0
+
+        dot = sum(weight * cv_vector[term] for term, weight in job_vector.items() if term in cv_vector)
+        norms = math.sqrt(sum(w * w for w in cv_vector.values())) * math.sqrt(sum(w * w for w in job_vector.values()))
+        cosine = dot / norms if norms else 0.0
+
+        fit = self.BM25_WEIGHT * coverage + (1 - self.BM25_WEIGHT) * cosine
+        top_terms = sorted(contributions.items(), key=lambda item: item[1], reverse=True)[:top_n]
+        missing = sorted(((t, w) for t, w in weights.items() if t not in cv_terms), key=lambda item: item[1], reverse=True)
+        return {
+            "fit_score": round(100 * fit),
+            "bm25": round(bm25, 3),
+            "bm25_coverage": round(coverage, 3),
+            "tfidf_cosine": round(cosine, 3),
+            "top_terms": [(spellings[term], round(weight, 3)) for term, weight in top_terms],
+            "missing_terms": [spellings[term] for term, _ in missing[:top_n]],
+        }
+
+    def rank(self, cv_text, job_descriptions, top_n=10):
+        """Scores one CV against many jobs (all added to the corpus first). Returns (index, result) best first."""
+        self.add_documents(job_descriptions)
+        results = [(i, self.score(cv_text, jd, top_n=top_n, update=False)) for i, jd in enumerate(job_descriptions)]
+        return sorted(results, key=lambda item: item[1]["fit_score"], reverse=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self._doc_hashes),
+                "terms": len(self._doc_freq),
+                "avg_length": round(self._total_length / max(len(self._doc_hashes), 1), 1),
+            }
+
+
+_shared_engine = None
+_shared_engine_lock = threading.Lock()
+
+
+def get_relevance_engine():
+    """Process-wide engine so corpus statistics are loaded from disk once."""
+    global _shared_engine
+    with _shared_engine_lock:
+        if _shared_engine is None:
+            _shared_engine = RelevanceEngine()
+        return _shared_engine
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class _SharedStream:
+    """Chunks produced by the leading caller of a streaming request, replayed to followers."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.cond = threading.Condition()
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight requests.
+    While a call for a given key is running, every other caller with the same key waits for
+    that call's result instead of issuing its own Gemini request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self._tasks = {}
+
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Runs fn() once per key at a time; concurrent callers share the same result or exception."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = Future()
+                self._calls[key] = future
+                self.leaders += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def do_stream(self, key, gen_fn):
+        """Streaming variant of do(): followers receive the leader's chunks as they arrive."""
+        with self._lock:
+            shared = self._streams.get(key)
+            if shared is None:
+                shared = _SharedStream()
+                self._streams[key] = shared
+                self.leaders += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if leader:
+            yield from self._lead_stream(key, shared, gen_fn)
+        else:
+            yield from self._follow_stream(shared)
+
+    def _lead_stream(self, key, shared, gen_fn):
+        try:
+            for chunk in gen_fn():
+                with shared.cond:
+                    shared.chunks.append(chunk)
+                    shared.cond.notify_all()
+                yield chunk
+        except GeneratorExit:
+            # Our consumer went away (e.g. a Streamlit rerun); don't hand followers a truncated result
+            shared.error = RuntimeError("The shared request was cancelled before it finished. Please try again.")
+            raise
+        except BaseException as e:
+            shared.error = e
+            raise
+        finally:
+            with self._lock:
+                self._streams.pop(key, None)
+            with shared.cond:
+                shared.done = True
+                shared.cond.notify_all()
+
+    def _follow_stream(self, shared):
+        index = 0
+        while True:
+            with shared.cond:
+                while index >= len(shared.chunks) and not shared.done:
+                    shared.cond.wait()
+                if index < len(shared.chunks):
+                    chunk = shared.chunks[index]
+                    index += 1
+                elif shared.error is not None:
+                    raise shared.error
+                else:
+                    return
+            yield chunk
+
+    async def do_async(self, key, coro_fn):
+        """Async variant of do() for coroutines running on the same event loop."""
+        task_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None or task.done():
+                task = asyncio.ensure_future(coro_fn())
+                self._tasks[task_key] = task
+                task.add_done_callback(lambda t: self._forget_task(task_key, t))
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        # shield() so one cancelled caller doesn't cancel the request for everyone else
+        return await asyncio.shield(task)
+
+    def _forget_task(self, task_key, task):
+        with self._lock:
+            if self._tasks.get(task_key) is task:
+                del self._tasks[task_key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._streams) + len(self._tasks),
+            }
+
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight():
+    """Process-wide instance so requests from different Streamlit sessions/threads are coalesced."""
+    global _single_flight
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight()
+        return _single_flight
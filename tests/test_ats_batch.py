@@ -0,0 +1,64 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from cv_processor import CVProcessor
+
+CV_TEMPLATE = """# Jane Doe
+jane.doe@example.com | (555) 123-4567 | linkedin.com/in/janedoe | Austin, TX
+
+## Professional Summary
+Engineer with 8 years of experience in {skills}.
+
+## Skills
+- {skills}
+
+## Work Experience
+### Senior Engineer, Acme
+- Led the {first} rollout, reducing deploy time by 40%
+- Developed services with {second}, saving $20000 per year
+
+## Education
+BSc Computer Science
+"""
+
+SKILLS = ["CI/CD", "Node.js", "AI/ML", "Kubernetes", "AWS", "Python", "Machine Learning", "EC2", "C++", "TypeScript"]
+
+JOB_DESCRIPTIONS = [
+    "We want CI/CD, Node.js and AI/ML experience. Kubernetes on AWS.",
+    "Python and Machine Learning on AWS; EC2 and C++ a plus.",
+    "TypeScript, Node.js and CI/CD. Kubernetes preferred.",
+    "",
+]
+
+
+def make_cvs():
+    cvs = []
+    for i in range(len(SKILLS)):
+        chosen = SKILLS[i:] + SKILLS[:i // 2]
+        cvs.append(CV_TEMPLATE.format(skills=", ".join(chosen), first=chosen[0], second=chosen[-1]))
+    return cvs
+
+
+def test_batch_scores_match_per_pair_validation():
+    processor = CVProcessor()
+    cvs = make_cvs()
+    batch = processor.score_ats_batch(cvs, JOB_DESCRIPTIONS)
+    for i, cv in enumerate(cvs):
+        for j, job_description in enumerate(JOB_DESCRIPTIONS):
+            assert batch.scores[i, j] == processor.validate_ats_compatibility(cv, job_description)["score"], (i, j)
+
+
+def test_job_description_matches_itself_in_batch():
+    processor = CVProcessor()
+    jobs = [jd for jd in JOB_DESCRIPTIONS if jd]
+    batch = processor.score_ats_batch(jobs, jobs)
+    for j in range(len(jobs)):
+        assert batch.match_rates[j, j] == 1.0
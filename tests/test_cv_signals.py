@@ -0,0 +1,48 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+import pytest
+
+from cv_processor import CVProcessor
+
+CV = """# Jane Doe
+jane.doe@example.com | (555) 123-4567 | linkedin.com/in/janedoe | Austin, TX
+
+## Professional Summary
+Engineer with 8 years of experience building distributed systems and data pipelines.
+
+## Skills
+- Python, Go
+
+## Work Experience
+### Engineer, Acme
+- Led the rollout, reducing deploy time by 40%
+- Developed services, saving $20000 and serving 100+ teams
+
+## Education
+BSc Computer Science
+"""
+
+ALL_SECTIONS = "CV looks good – all required sections are present."
+
+# Score, validate_cv message and gap elements as the checks have always reported them,
+# headings and bullets being found by whole-text regexes rather than by the parsed sections
+CASES = {
+    "no_space_heading": (CV.replace("## Education", "##Education"), 98, ALL_SECTIONS),
+    "h3_skills": (CV.replace("## Skills", "### Skills"), 98, ALL_SECTIONS),
+    "indented_heading": (CV.replace("## Work Experience", "  ## Work Experience"), 98, ALL_SECTIONS),
+    "bare_dash": (CV.replace("- Python, Go", "-\nPython, Go").replace("- Led", "Led").replace("- Developed", "Developed"),
+                  103, ALL_SECTIONS),
+}
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_checks_keep_whole_text_semantics(name):
+    cv_text, score, message = CASES[name]
+    processor = CVProcessor()
+    assert processor.validate_ats_compatibility(cv_text)["score"] == score
+    assert processor.validate_cv(cv_text) == message
+    assert processor.identify_cv_gaps(cv_text)["missing_elements"] == ["work_experience", "education"]
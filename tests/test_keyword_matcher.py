@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from cv_signals import extract_job_keywords
+from keyword_matcher import get_keyword_matcher
+
+JOB_DESCRIPTIONS = [
+    "We want CI/CD, Node.js and AI/ML experience. Kubernetes on AWS.",
+    "Senior Backend Engineer\nPython, Go and C++ on GCP. Experience with REST APIs, EC2 and S3.\n"
+    "Nice to have: Machine Learning, TypeScript/React, full-stack work and ASP.NET.",
+    "Data Analyst - SQL, Power BI, Tableau; A/B testing; KPIs for the Sales and Marketing teams.",
+    "Role: DevOps (Terraform/Ansible), Docker's tooling, k8s, Node.js.\tMicrosoft Azure, C#.",
+]
+
+
+@pytest.mark.parametrize("job_description", JOB_DESCRIPTIONS)
+def test_job_description_matches_itself(job_description):
+    result = get_keyword_matcher(job_description).match(job_description)
+    assert result["missing"] == []
+    assert result["match_rate"] == 1.0
+
+
+def test_slash_and_dot_terms_are_single_keywords():
+    keywords = extract_job_keywords(JOB_DESCRIPTIONS[0])
+    assert {"CI/CD", "Node.js", "AI/ML", "Kubernetes", "AWS"} <= keywords
+    assert not {"CI", "CD", "Node", "AI", "ML"} & keywords
@@ -0,0 +1,179 @@
+import os
+import re
+import math
+import threading
+
+# Approximate characters per token for each model family. Gemini averages ~4 chars/token
+# on English prose; counting locally avoids a count_tokens round trip per call.
+CHARS_PER_TOKEN = {
+    "gemini": 4.0,
+}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+")
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that the their this to
+was we will with you your who what which work team role job years year experience
+""".split())
+
+# Lines longer than this many tokens are split into sentences before ranking
+_MAX_UNIT_TOKENS = 120
+# The first lines of a document (name, contact details, job title) are always kept
+_LEADING_LINES = 3
+
+
+class PromptTooLargeError(ValueError):
+    """Raised when a prompt is still over the model budget after trimming."""
+
+
+def count_tokens(text, model_name="gemini"):
+    """Estimates the number of tokens `text` costs for `model_name`."""
+    if not text:
+        return 0
+    ratio = DEFAULT_CHARS_PER_TOKEN
+    for family, chars in CHARS_PER_TOKEN.items():
+        if model_name.startswith(family):
+            ratio = chars
+            break
+    return int(math.ceil(len(text) / ratio))
+
+
+def _terms(text):
+    return {w for w in _WORD_RE.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+
+def _units(text, model_name):
+    """Splits text into (line_index, text) units small enough to rank individually."""
+    units = []
+    for i, line in enumerate(text.splitlines()):
+        if not line.strip():
+            continue
+        if count_tokens(line, model_name) <= _MAX_UNIT_TOKENS:
+            units.append((i, line))
+        else:
+            # PDF extraction often yields huge unbroken lines; rank sentences instead
+            for sentence in _SENTENCE_RE.split(line):
+                if sentence.strip():
+                    units.append((i, sentence))
+    return units
+
+
+def trim_to_budget(text, max_tokens, reference="", model_name="gemini"):
+    """
+    Trims `text` to at most `max_tokens` by relevance instead of by prefix.
+    Units are ranked by term overlap with `reference` (e.g. the JD when trimming a CV);
+    without a reference, content-rich lines win over short navigation/footer noise.
+    Markdown headings and the leading lines are kept first, and the surviving units
+    are returned in their original order.
+    """
+    if not text or count_tokens(text, model_name) <= max_tokens:
+        return text
+
+    ref_terms = _terms(reference) if reference else None
+    ranked = []
+    for position, (line_no, unit) in enumerate(_units(text, model_name)):
+        stripped = unit.strip()
+        words = _terms(stripped)
+        if stripped.startswith('#') or position < _LEADING_LINES:
+            score = float('inf')
+        elif ref_terms is not None:
+            score = len(words & ref_terms) / math.sqrt(len(words) + 1)
+        else:
+            score = min(len(words), 30)
+        ranked.append((score, position, line_no, unit))
+
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+    kept = []
+    used = 0
+    for score, position, line_no, unit in ranked:
+        cost = count_tokens(unit, model_name) + 1
+        if used + cost > max_tokens:
+            continue
+        kept.append((position, line_no, unit))
+        used += cost
+
+    kept.sort()
+    lines = []
+    last_line_no = None
+    for position, line_no, unit in kept:
+        # Sentences from the same source line are re-joined on one line
+        if line_no == last_line_no:
+            lines[-1] += " " + unit.strip()
+        else:
+            lines.append(unit)
+        last_line_no = line_no
+    return "\n".join(lines)
+
+
+class TokenBudget:
+    """
+    Per-model token accounting for prompts.
+    Each prompt part (CV, job description, additional info, ...) gets its own budget and is
+    trimmed by relevance; the assembled prompt is then checked against the model-wide limit
+    so oversized requests never reach the API.
+    """
+
+    def __init__(self, model_name="gemini", max_prompt_tokens=None):
+        self.model_name = model_name
+        self.max_prompt_tokens = max_prompt_tokens or int(os.getenv("GEMINI_MAX_PROMPT_TOKENS", 30000))
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.total_prompt_tokens = 0
+        self.largest_prompt_tokens = 0
+        self.last_prompt_tokens = 0
+        self.trimmed_parts = 0
+
+    def count(self, text):
+        return count_tokens(text, self.model_name)
+
+    def fit(self, parts, limits):
+        """
+        Trims each named part to its limit. `parts` maps names to text; `limits` maps the
+        same names to token budgets (parts without a limit pass through untouched).
+        The CV and job description are used as each other's relevance reference, and the CV as the
+        reference for any other part. A part with no reference (a CV sent without a JD) is trimmed
+        by content instead of being ranked against itself.
+        """
+        references = {
+            'cv': parts.get('job_description', ''),
+            'job_description': parts.get('cv', ''),
+        }
+        fitted = {}
+        for name, text in parts.items():
+            limit = limits.get(name)
+            if text and limit is not None and self.count(text) > limit:
+                reference = references[name] if name in references else parts.get('cv', '')
+                fitted[name] = trim_to_budget(text, limit, reference or None, self.model_name)
+                with self._lock:
+                    self.trimmed_parts += 1
+            else:
+                fitted[name] = text
+        return fitted
+
+    def check(self, prompt):
+        """Counts the final prompt, records it and raises PromptTooLargeError if it is over budget."""
+        tokens = self.count(prompt)
+        if tokens > self.max_prompt_tokens:
+            raise PromptTooLargeError(
+                f"The request is too large ({tokens} tokens, limit {self.max_prompt_tokens}). "
+                "Please shorten your CV or job description."
+            )
+        with self._lock:
+            self.calls += 1
+            self.total_prompt_tokens += tokens
+            self.largest_prompt_tokens = max(self.largest_prompt_tokens, tokens)
+            self.last_prompt_tokens = tokens
+        return tokens
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "last_prompt_tokens": self.last_prompt_tokens,
+                "largest_prompt_tokens": self.largest_prompt_tokens,
+                "avg_prompt_tokens": self.total_prompt_tokens // self.calls if self.calls else 0,
+                "trimmed_parts": self.trimmed_parts,
+                "max_prompt_tokens": self.max_prompt_tokens,
+            }